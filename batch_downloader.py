@@ -8,13 +8,16 @@ Ideal para descargas masivas de grabaciones.
 
 Funcionalidades:
 - Soporte para descarga masiva desde archivos
+- Descargas simultaneas con un pool de hilos (--jobs)
+- Grupos de URLs por ejecucion de yt-dlp (--lotes)
 - Reintentos automaticos con backoff exponencial
 - Barra de progreso visual
-- Conversión automatica de video a audio MP3
+- Video, audio MP3 y transcripcion en una sola invocacion de yt-dlp
 - Extracción de transcripciones cuando disponibles
 - Nombres de archivo personalizados desde CSV
 - Logging persistente
 - Metadatos de descarga
+- Registro SQLite de descargas completadas para reanudar sin repetirlas
 
 Formatos de entrada:
 - TXT: una URL de Zoom por linea
@@ -27,140 +30,457 @@ Autor: Zoom Video Downloader
 Version: 2.0.0
 """
 
+import os
 import sys
+import time
+import functools
+import itertools
+import shutil
 import argparse
 import logging
-from typing import Dict, Any, Optional, List, Tuple
+import sqlite3
+import subprocess
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import (
+    Dict,
+    Any,
+    Optional,
+    List,
+    Tuple,
+    FrozenSet,
+    Iterable,
+    Callable,
+    NamedTuple,
+)
 from pathlib import Path
 
 from core import (
     cargar_configuracion,
     inicializar_logging,
     crear_directorios,
+    extension_audio,
     sanitizar_nombre_archivo,
     validar_url_zoom,
     instalar_dependencias,
     verificar_ffmpeg,
-    convertir_a_mp3,
     convertir_vtt_a_srt,
     BarraProgreso,
     reintentar_con_backoff,
     guardar_metadatos,
-    formatear_tamano,
-    Colores,
-    imprimir_texto,
-    leer_urls_desde_archivo,
+    iterar_urls_desde_archivo,
+    ejecutar_yt_dlp,
+    TipoDescarga,
+    iniciar_registro_en_cola,
+    detener_registro_en_cola,
+    completar_en_paralelo,
 )
 
 
-def construir_comando_yt_dlp(
-    url: str, tipo: str, nombre_salida: str, config: Dict[str, Any]
-) -> Tuple[Optional[List[str]], Optional[str], Optional[str]]:
+# main() lo activa tras comprobar yt-dlp y crear las carpetas una sola vez,
+# para que ejecutar_descarga no repita esas comprobaciones por cada URL
+_DEPENDENCIAS_LISTAS = False
+
+# Carpeta (clave de config["descargas"]) y extension del archivo principal
+# que genera cada tipo de descarga. Las transcripciones no llevan extension:
+# yt-dlp anade idioma y formato a la ruta base. La del audio depende de
+# video.formato_audio (None).
+_SALIDAS_POR_TIPO = {
+    TipoDescarga.VIDEO: ("video", ".mp4"),
+    TipoDescarga.AUDIO: ("audio", None),
+    TipoDescarga.TRANSCRIPCION: ("transcripcion", ""),
+    TipoDescarga.TODO: ("video", ".mp4"),
+}
+
+
+# Marca que ocupa el lugar del nombre de salida en las plantillas de comando
+_MARCA_NOMBRE = "{nombre}"
+
+PlantillaComando = Tuple[Optional[List[str]], Optional[str], Optional[str]]
+
+
+class RutasDescarga(NamedTuple):
+    """Carpetas de salida resueltas a partir de config["descargas"]."""
+
+    video: str
+    audio: str
+    transcripcion: str
+
+
+@functools.lru_cache(maxsize=8)
+def _resolver_rutas(
+    base: str, video: str, audio: str, transcripcion: str
+) -> RutasDescarga:
+    # Normalizadas igual que las de listar_archivos_existentes: con una base
+    # como "./downloads" o "downloads/" las rutas de salida deben coincidir
+    return RutasDescarga(
+        os.path.normpath(os.path.join(base, video)),
+        os.path.normpath(os.path.join(base, audio)),
+        os.path.normpath(os.path.join(base, transcripcion)),
+    )
+
+
+def rutas_descarga(config: Dict[str, Any]) -> RutasDescarga:
     """
-    Construir comando de yt-dlp segun el tipo de descarga.
+    Obtener las carpetas de salida, calculadas una sola vez por configuracion.
 
     Args:
-        url: URL de la grabacion de Zoom
-        tipo: Tipo de descarga (video, audio, transcript, all)
-        nombre_salida: Nombre base para el archivo de salida
         config: Configuracion del programa
 
     Returns:
-        Tupla (comando, ruta_salida, tipo_archivos)
+        RutasDescarga con las carpetas de video, audio y transcripcion
     """
     dirs = config["descargas"]
+    return _resolver_rutas(
+        str(dirs["directorio_base"]),
+        dirs["video"],
+        dirs["audio"],
+        dirs["transcripcion"],
+    )
+
+
+def _argumentos_video(rutas: RutasDescarga, opciones: Dict[str, Any]) -> List[str]:
+    return [
+        "--format",
+        opciones["formato_video"],
+        "--output",
+        os.path.join(rutas.video, f"{_MARCA_NOMBRE}.mp4"),
+    ]
+
+
+def _argumentos_audio(rutas: RutasDescarga, opciones: Dict[str, Any]) -> List[str]:
+    return [
+        "--extract-audio",
+        *opciones["audio"],
+        "--output",
+        os.path.join(rutas.audio, f"{_MARCA_NOMBRE}.%(ext)s"),
+    ]
+
+
+def _argumentos_transcripcion(
+    rutas: RutasDescarga, opciones: Dict[str, Any]
+) -> List[str]:
+    # yt-dlp anade idioma y formato a la ruta base
+    return [
+        *opciones["subtitulos"],
+        "--skip-download",
+        "--output",
+        os.path.join(rutas.transcripcion, _MARCA_NOMBRE),
+    ]
+
+
+def _argumentos_todo(rutas: RutasDescarga, opciones: Dict[str, Any]) -> List[str]:
+    # Una sola invocacion: yt-dlp extrae el audio con su postprocesador
+    # de ffmpeg (--keep-video conserva el MP4) y envia los subtitulos
+    # directamente a la carpeta de transcripciones.
+    argumentos = ["--format", opciones["formato_video"]]
+    if opciones["convertir_audio"]:
+        argumentos += ["--extract-audio", "--keep-video", *opciones["audio"]]
+    return argumentos + [
+        *opciones["subtitulos"],
+        "--output",
+        os.path.join(rutas.video, f"{_MARCA_NOMBRE}.mp4"),
+        "--output",
+        "subtitle:" + os.path.join(rutas.transcripcion, f"{_MARCA_NOMBRE}.%(ext)s"),
+    ]
+
+
+# Argumentos especificos de cada tipo de descarga
+_ARGUMENTOS_POR_TIPO = {
+    TipoDescarga.VIDEO: _argumentos_video,
+    TipoDescarga.AUDIO: _argumentos_audio,
+    TipoDescarga.TRANSCRIPCION: _argumentos_transcripcion,
+    TipoDescarga.TODO: _argumentos_todo,
+}
+
+
+def preparar_plantilla_comando(tipo: str, config: Dict[str, Any]) -> PlantillaComando:
+    """
+    Construir una sola vez el comando de yt-dlp de un tipo de descarga.
+
+    El nombre de salida queda como {nombre} y la URL no se incluye; ambos
+    se completan por grabacion en construir_comando_yt_dlp.
+
+    Args:
+        tipo: Tipo de descarga (video, audio, transcript, all)
+        config: Configuracion del programa
+
+    Returns:
+        Tupla (comando, ruta_salida, tipo_archivos) con la marca {nombre}
+    """
+    argumentos_tipo = _ARGUMENTOS_POR_TIPO.get(tipo)
+    if argumentos_tipo is None:
+        return None, None, None
+
+    rutas = rutas_descarga(config)
     video_config = config.get("video", {})
     transcript_config = config.get("transcripcion", {})
+    descarga_config = config.get("descarga", {})
 
-    if tipo == "video":
-        ruta_salida = str(
-            Path(dirs["directorio_base"]) / dirs["video"] / f"{nombre_salida}.mp4"
-        )
-        cmd = [
-            "yt-dlp",
-            "--no-warnings",
-            "--format",
-            f"best[ext={video_config.get('formato_preferido', 'mp4')}]/best",
-            "--output",
-            ruta_salida,
-            url,
-        ]
-        return cmd, ruta_salida, "video"
-
-    elif tipo == "audio":
-        ruta_salida = str(
-            Path(dirs["directorio_base"]) / dirs["audio"] / f"{nombre_salida}.mp3"
-        )
-        cmd = [
-            "yt-dlp",
-            "--no-warnings",
-            "--extract-audio",
+    opciones = {
+        "formato_video": (
+            f"best[ext={video_config.get('formato_preferido', 'mp4')}]/best"
+        ),
+        "audio": [
             "--audio-format",
             video_config.get("formato_audio", "mp3"),
             "--audio-quality",
             str(video_config.get("calidad_audio", "0")),
-            "--output",
-            str(
-                Path(dirs["directorio_base"])
-                / dirs["audio"]
-                / f"{nombre_salida}.%(ext)s"
-            ),
-            url,
-        ]
-        return cmd, ruta_salida, "audio"
-
-    elif tipo == "transcript":
-        ruta_base = str(
-            Path(dirs["directorio_base"]) / dirs["transcripcion"] / nombre_salida
-        )
-        cmd = [
-            "yt-dlp",
-            "--no-warnings",
+        ],
+        "subtitulos": [
             "--write-subs",
             "--write-auto-subs",
             "--sub-langs",
             transcript_config.get("idiomas", "all"),
-            "--skip-download",
-            "--output",
-            ruta_base,
-            url,
-        ]
-        return cmd, ruta_base, "transcript"
-
-    elif tipo == "all":
-        ruta_video = str(
-            Path(dirs["directorio_base"]) / dirs["video"] / f"{nombre_salida}.mp4"
+        ],
+        "convertir_audio": video_config.get("convertir_audio", True),
+    }
+
+    cmd = [
+        "yt-dlp",
+        "--no-warnings",
+        "--no-overwrites",
+        "--concurrent-fragments",
+        str(descarga_config.get("fragmentos_paralelos", 4)),
+    ]
+
+    bloque_http = descarga_config.get("bloque_http", "10M")
+    if bloque_http:
+        cmd += ["--http-chunk-size", str(bloque_http)]
+
+    limite_velocidad = descarga_config.get("limite_velocidad")
+    if limite_velocidad:
+        cmd += ["--limit-rate", str(limite_velocidad)]
+
+    cmd += argumentos_tipo(rutas, opciones)
+
+    clave_dir, extension = _SALIDAS_POR_TIPO[tipo]
+    if extension is None:
+        extension = extension_audio(config)
+    ruta_salida = os.path.join(getattr(rutas, clave_dir), _MARCA_NOMBRE + extension)
+
+    return cmd, ruta_salida, tipo
+
+
+def construir_comando_yt_dlp(
+    url: str,
+    tipo: str,
+    nombre_salida: str,
+    config: Dict[str, Any],
+    plantilla: Optional[PlantillaComando] = None,
+) -> Tuple[Optional[List[str]], Optional[str], Optional[str]]:
+    """
+    Construir comando de yt-dlp segun el tipo de descarga.
+
+    Args:
+        url: URL de la grabacion de Zoom
+        tipo: Tipo de descarga (video, audio, transcript, all)
+        nombre_salida: Nombre base para el archivo de salida
+        config: Configuracion del programa
+        plantilla: Resultado de preparar_plantilla_comando para el mismo
+            tipo; si es None se prepara en el momento
+
+    Returns:
+        Tupla (comando, ruta_salida, tipo_archivos)
+    """
+    if plantilla is None:
+        plantilla = preparar_plantilla_comando(tipo, config)
+
+    cmd_plantilla, ruta_plantilla, tipo_archivos = plantilla
+    if cmd_plantilla is None:
+        return None, None, None
+
+    cmd = [arg.replace(_MARCA_NOMBRE, nombre_salida) for arg in cmd_plantilla]
+    cmd.append(url)
+    return cmd, ruta_plantilla.replace(_MARCA_NOMBRE, nombre_salida), tipo_archivos
+
+
+def opciones_reintento(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Traducir la seccion reintentos de la configuracion a reintentar_con_backoff.
+
+    Args:
+        config: Configuracion del programa
+
+    Returns:
+        Argumentos con nombre para reintentar_con_backoff
+    """
+    reintentos = config.get("reintentos", {})
+    return {
+        "max_reintentos": reintentos.get("maximos", 3),
+        "intervalo_base": reintentos.get("intervalo_segundos", 5),
+        "max_espera": reintentos.get("max_espera_segundos", 30),
+        "variacion": reintentos.get("variacion", 0.5),
+    }
+
+
+def crear_aviso_progreso(
+    nombre: str, logger: logging.Logger, paso: int = 25
+) -> Callable[[float], None]:
+    """
+    Crear una funcion que registra el progreso de una descarga por tramos.
+
+    Solo se escribe un mensaje cada vez que se supera un multiplo de paso,
+    para no llenar el log con una linea por fragmento.
+
+    Args:
+        nombre: Nombre de la descarga que aparece en el mensaje
+        logger: Logger donde se registra el progreso
+        paso: Porcentaje entre dos avisos consecutivos
+
+    Returns:
+        Funcion que recibe el porcentaje descargado
+    """
+    ultimo = [0]
+
+    def avisar(porcentaje: float) -> None:
+        tramo = int(porcentaje) // paso * paso
+        if tramo > ultimo[0]:
+            ultimo[0] = tramo
+            logger.debug(f"{nombre}: {tramo}% descargado")
+
+    return avisar
+
+
+def ejecutar_yt_dlp_reintentable(
+    cmd: List[str], progreso: Optional[Callable[[float], None]] = None
+) -> subprocess.CompletedProcess:
+    """
+    Ejecutar yt-dlp tratando la limitacion de peticiones como error temporal.
+
+    Un HTTP 429 de Zoom se convierte en excepcion para que
+    reintentar_con_backoff espere y repita la descarga.
+
+    Args:
+        cmd: Comando de yt-dlp
+        progreso: Funcion que recibe el porcentaje descargado
+
+    Returns:
+        CompletedProcess de ejecutar_yt_dlp
+    """
+    resultado = ejecutar_yt_dlp(cmd, progreso=progreso)
+    if resultado.returncode != 0 and "HTTP Error 429" in (resultado.stderr or ""):
+        raise RuntimeError("Zoom ha limitado las peticiones (HTTP 429)")
+    return resultado
+
+
+def listar_archivos_existentes(directorios: Dict[str, Path]) -> FrozenSet[str]:
+    """
+    Listar una sola vez los videos y audios ya descargados.
+
+    Args:
+        directorios: Rutas devueltas por crear_directorios
+
+    Returns:
+        Conjunto con las rutas normalizadas (como texto) de los archivos
+        existentes, comparables con las de rutas_descarga
+    """
+    existentes = set()
+    for clave in ("video", "audio"):
+        carpeta = os.path.normpath(directorios[clave])
+        with os.scandir(carpeta) as entradas:
+            existentes.update(
+                os.path.join(carpeta, entrada.name)
+                for entrada in entradas
+                if entrada.is_file()
+            )
+    return frozenset(existentes)
+
+
+class RegistroDescargas:
+    """
+    Registro SQLite de las descargas completadas.
+
+    Permite que una nueva ejecucion sobre el mismo archivo de URLs omita las
+    grabaciones ya descargadas sin lanzar yt-dlp para ellas. Solo se usa
+    desde el hilo principal: los hilos del pool no acceden a la conexion.
+    """
+
+    def __init__(self, ruta: str):
+        """
+        Abrir (o crear) el registro.
+
+        Args:
+            ruta: Ruta del archivo SQLite
+        """
+        Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+        self.conexion = sqlite3.connect(ruta, isolation_level=None)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute(
+            "CREATE TABLE IF NOT EXISTS descargas ("
+            "url TEXT, tipo TEXT, ruta TEXT, fecha INTEGER, "
+            "PRIMARY KEY (url, tipo))"
         )
-        cmd = [
-            "yt-dlp",
-            "--no-warnings",
-            "--format",
-            f"best[ext={video_config.get('formato_preferido', 'mp4')}]/best",
-            "--write-subs",
-            "--write-auto-subs",
-            "--sub-langs",
-            transcript_config.get("idiomas", "all"),
-            "--output",
-            ruta_video,
-            url,
-        ]
-        return cmd, ruta_video, "all"
 
-    return None, None, None
+    def completada(self, url: str, tipo: str) -> bool:
+        """
+        Comprobar si una grabacion ya se descargo y su archivo sigue existiendo.
+
+        Args:
+            url: URL de la grabacion
+            tipo: Tipo de descarga
+
+        Returns:
+            True si se puede omitir la descarga
+        """
+        fila = self.conexion.execute(
+            "SELECT ruta FROM descargas WHERE url = ? AND tipo = ?",
+            (url, str(tipo)),
+        ).fetchone()
+        # Las transcripciones no tienen una ruta unica que comprobar
+        return fila is not None and (not fila[0] or os.path.exists(fila[0]))
+
+    def marcar(self, url: str, tipo: str, ruta: Optional[str]) -> None:
+        """
+        Anotar una descarga completada.
+
+        Args:
+            url: URL de la grabacion
+            tipo: Tipo de descarga
+            ruta: Archivo principal generado (None para transcripciones)
+        """
+        self.conexion.execute(
+            "INSERT OR REPLACE INTO descargas VALUES (?, ?, ?, strftime('%s', 'now'))",
+            (url, str(tipo), ruta),
+        )
+
+    def cerrar(self) -> None:
+        """Cerrar la conexion con el registro."""
+        self.conexion.close()
+
+    def __enter__(self) -> "RegistroDescargas":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        # Tambien ante una interrupcion o un error en el pool: main() se
+        # ejecuta desde la interfaz y la conexion no debe quedar abierta
+        self.cerrar()
 
 
 def ejecutar_descarga(
-    url: str, tipo: str, nombre: str, config: Dict[str, Any], logger: logging.Logger
+    url: str,
+    tipo: str,
+    nombre: str,
+    config: Dict[str, Any],
+    logger: logging.Logger,
+    existentes: Optional[FrozenSet[str]] = None,
+    plantilla: Optional[PlantillaComando] = None,
 ) -> bool:
     """
     Ejecutar la descarga de una grabacion de Zoom.
 
+    Las carpetas de descarga deben existir (main() llama a crear_directorios
+    una vez antes de lanzar los hilos).
+
     Args:
         url: URL de la grabacion
         tipo: Tipo de descarga
         nombre: Nombre del video
         config: Configuracion del programa
         logger: Logger para registrar eventos
+        existentes: Archivos ya descargados (ver listar_archivos_existentes);
+            si es None se consulta el disco
+        plantilla: Comando preparado con preparar_plantilla_comando
 
     Returns:
         True si la descarga fue exitosa
@@ -170,7 +490,7 @@ def ejecutar_descarga(
         logger.error(f"URL invalida: {url}")
         return False
 
-    if not instalar_dependencias(logger):
+    if not _DEPENDENCIAS_LISTAS and not instalar_dependencias(logger):
         logger.error("No se pudo instalar yt-dlp")
         return False
 
@@ -178,23 +498,31 @@ def ejecutar_descarga(
 
     logger.info(f"Descargando: {nombre_archivo} (tipo: {tipo})")
 
-    crear_directorios(config)
-
     cmd, ruta_salida, tipo_archivos = construir_comando_yt_dlp(
-        url, tipo, nombre_archivo, config
+        url, tipo, nombre_archivo, config, plantilla
     )
 
     if not cmd:
         logger.error(f"Tipo de descarga no valido: {tipo}")
         return False
 
-    reintentos = config.get("reintentos", {}).get("maximos", 3)
+    # Reejecutar un lote no vuelve a descargar lo que ya termino bien
+    if tipo_archivos != TipoDescarga.TRANSCRIPCION and (
+        ruta_salida in existentes
+        if existentes is not None
+        else Path(ruta_salida).exists()
+    ):
+        logger.info(f"Ya existe, se omite: {ruta_salida}")
+        return True
 
     exito, resultado = reintentar_con_backoff(
-        func=lambda: __import__("subprocess").run(cmd, capture_output=True, text=True),
-        max_reintentos=reintentos,
-        intervalo_base=config.get("reintentos", {}).get("intervalo_segundos", 5),
+        func=functools.partial(
+            ejecutar_yt_dlp_reintentable,
+            cmd,
+            crear_aviso_progreso(nombre_archivo, logger),
+        ),
         logger=logger,
+        **opciones_reintento(config),
     )
 
     if not exito:
@@ -207,39 +535,63 @@ def ejecutar_descarga(
 
     logger.info(f"Descarga completada: {nombre_archivo}")
 
-    rutas_archivos = {}
+    procesar_archivos_descargados(
+        url, tipo, nombre_archivo, ruta_salida, tipo_archivos, config, logger
+    )
 
-    if tipo_archivos in ["video", "all"]:
-        if tipo == "all":
-            import subprocess
+    return True
 
-            video_file = str(
-                Path(config["descargas"]["directorio_base"])
-                / config["descargas"]["video"]
-                / f"{nombre_archivo}.mp4"
-            )
-            audio_file = str(
-                Path(config["descargas"]["directorio_base"])
-                / config["descargas"]["audio"]
-                / f"{nombre_archivo}.mp3"
-            )
 
-            if Path(video_file).exists():
-                convertir_a_mp3(video_file, audio_file, logger, config)
+def procesar_archivos_descargados(
+    url: str,
+    tipo: str,
+    nombre_archivo: str,
+    ruta_salida: str,
+    tipo_archivos: str,
+    config: Dict[str, Any],
+    logger: logging.Logger,
+) -> None:
+    """
+    Mover el audio extraido, convertir transcripciones y guardar metadatos.
+
+    Args:
+        url: URL de la grabacion
+        tipo: Tipo de descarga
+        nombre_archivo: Nombre (ya sanitizado) de los archivos de salida
+        ruta_salida: Ruta principal devuelta por construir_comando_yt_dlp
+        tipo_archivos: Tipo de archivos generados
+        config: Configuracion del programa
+        logger: Logger para registrar eventos
+    """
+    rutas = rutas_descarga(config)
+    rutas_archivos = {}
+
+    if tipo_archivos in (TipoDescarga.VIDEO, TipoDescarga.TODO):
+        if tipo == TipoDescarga.TODO:
+            # El audio se deriva de la ruta del video para que ambos nombres
+            # no puedan divergir
+            video_file = Path(ruta_salida)
+            extension = extension_audio(config)
+            audio_file = os.path.join(rutas.audio, video_file.stem + extension)
+
+            # yt-dlp deja el audio extraido junto al video; se mueve a su carpeta
+            audio_extraido = video_file.with_suffix(extension)
+            if audio_extraido.exists():
+                shutil.move(str(audio_extraido), audio_file)
                 rutas_archivos["audio"] = audio_file
 
         rutas_archivos["video"] = ruta_salida
 
-    if tipo_archivos in ["transcript", "all"]:
-        import glob
-
-        archivos_vtt = glob.glob(
-            str(
-                Path(config["descargas"]["directorio_base"])
-                / config["descargas"]["transcripcion"]
-                / f"{nombre_archivo}*.vtt"
-            )
-        )
+    if tipo_archivos in (TipoDescarga.TRANSCRIPCION, TipoDescarga.TODO):
+        # Un solo recorrido de la carpeta; el prefijo termina en punto para
+        # que "clase_1" no recoja los subtitulos de "clase_10"
+        prefijo = f"{nombre_archivo}."
+        with os.scandir(rutas.transcripcion) as entradas:
+            archivos_vtt = [
+                entrada.path
+                for entrada in entradas
+                if entrada.name.startswith(prefijo) and entrada.name.endswith(".vtt")
+            ]
 
         convertir_srt = "srt" in config.get("transcripcion", {}).get(
             "formatos_salida", []
@@ -253,15 +605,158 @@ def ejecutar_descarga(
     if rutas_archivos:
         guardar_metadatos(nombre_archivo, url, tipo, rutas_archivos, logger)
 
-    return True
 
+def renombrar_por_id(
+    directorios: Dict[str, Path], video_id: str, nombre_archivo: str
+) -> int:
+    """
+    Renombrar los archivos guardados como <id>.* al nombre elegido.
+
+    Args:
+        directorios: Rutas devueltas por crear_directorios
+        video_id: ID de la grabacion usado por yt-dlp en la plantilla
+        nombre_archivo: Nombre final (ya sanitizado)
 
-def obtener_argumentos() -> argparse.Namespace:
+    Returns:
+        Numero de archivos renombrados
     """
-    Parsear argumentos de linea de comandos.
+    prefijo = f"{video_id}."
+    renombrados = 0
+    for clave in ("video", "audio", "transcripcion"):
+        with os.scandir(directorios[clave]) as entradas:
+            coincidencias = [
+                entrada.name
+                for entrada in entradas
+                if entrada.name.startswith(prefijo)
+            ]
+        for archivo in coincidencias:
+            destino = nombre_archivo + archivo[len(video_id) :]
+            os.replace(directorios[clave] / archivo, directorios[clave] / destino)
+            renombrados += 1
+    return renombrados
+
+
+def ejecutar_descarga_lote(
+    urls: List[Tuple[str, str]],
+    tipo: str,
+    config: Dict[str, Any],
+    logger: logging.Logger,
+    existentes: Optional[FrozenSet[str]] = None,
+    plantilla: Optional[PlantillaComando] = None,
+) -> List[bool]:
+    """
+    Descargar un grupo de grabaciones con una sola ejecucion de yt-dlp.
+
+    Las URLs se pasan a yt-dlp con --batch-file, de modo que el arranque
+    de yt-dlp y la carga de sus extractores se pagan una vez por grupo.
+
+    yt-dlp guarda cada grabacion con su ID como nombre (%(id)s) y al
+    terminar los archivos se renombran al nombre de la lista, de modo
+    que se conservan los titulos del CSV.
+
+    Args:
+        urls: Lista de tuplas (nombre, url)
+        tipo: Tipo de descarga
+        config: Configuracion del programa
+        logger: Logger para registrar eventos
+        existentes: Archivos ya descargados (ver listar_archivos_existentes)
+        plantilla: Comando preparado con preparar_plantilla_comando
 
     Returns:
-        Namespace con los argumentos parseados
+        Lista con el resultado de cada URL, en el mismo orden
+    """
+    directorios = crear_directorios(config)
+    if existentes is None:
+        existentes = listar_archivos_existentes(directorios)
+    if plantilla is None:
+        plantilla = preparar_plantilla_comando(tipo, config)
+
+    resultados = [False] * len(urls)
+    pendientes = []
+
+    for i, (nombre, url) in enumerate(urls):
+        es_valida, video_id = validar_url_zoom(url)
+        if not es_valida:
+            logger.error(f"URL invalida: {url}")
+            continue
+
+        nombre_archivo = sanitizar_nombre_archivo(nombre)
+        _, ruta_salida, tipo_archivos = construir_comando_yt_dlp(
+            url, tipo, nombre_archivo, config, plantilla
+        )
+        if tipo_archivos is None:
+            logger.error(f"Tipo de descarga no valido: {tipo}")
+            return resultados
+
+        if tipo_archivos != TipoDescarga.TRANSCRIPCION and ruta_salida in existentes:
+            logger.info(f"Ya existe, se omite: {ruta_salida}")
+            resultados[i] = True
+            continue
+
+        pendientes.append((i, url, video_id, nombre_archivo, ruta_salida))
+
+    if not pendientes:
+        return resultados
+
+    cmd, _, tipo_archivos = construir_comando_yt_dlp(
+        pendientes[0][1], tipo, "%(id)s", config, plantilla
+    )
+
+    # Las URLs van en un archivo (--batch-file) y no como argumentos, asi
+    # un lote grande no choca con el limite de longitud de la linea de
+    # comandos cuando yt-dlp se ejecuta como proceso externo
+    with tempfile.NamedTemporaryFile(
+        "w", suffix=".txt", encoding="ascii", delete=False
+    ) as lista:
+        lista.writelines(f"{url}\n" for _, url, _, _, _ in pendientes)
+    cmd[-1:] = ["--batch-file", lista.name]
+
+    logger.info(f"Descargando lote de {len(pendientes)} grabaciones (tipo: {tipo})")
+
+    try:
+        exito, resultado = reintentar_con_backoff(
+            func=functools.partial(ejecutar_yt_dlp_reintentable, cmd),
+            logger=logger,
+            **opciones_reintento(config),
+        )
+    finally:
+        os.unlink(lista.name)
+
+    if exito and resultado.returncode != 0:
+        logger.error(f"yt-dlp error: {resultado.stderr}")
+
+    # Aunque yt-dlp termine con error, las grabaciones que si se
+    # descargaron se renombran y cuentan como exitosas
+    for i, url, video_id, nombre_archivo, ruta_salida in pendientes:
+        renombrados = renombrar_por_id(directorios, video_id, nombre_archivo)
+        if tipo_archivos == TipoDescarga.TRANSCRIPCION:
+            completada = renombrados > 0
+        else:
+            completada = Path(ruta_salida).exists()
+
+        if not completada:
+            logger.error(f"Descarga fallida: {nombre_archivo}")
+            continue
+
+        logger.info(f"Descarga completada: {nombre_archivo}")
+        procesar_archivos_descargados(
+            url, tipo, nombre_archivo, ruta_salida, tipo_archivos, config, logger
+        )
+        resultados[i] = True
+
+    return resultados
+
+
+@functools.lru_cache(maxsize=None)
+def _crear_parser() -> argparse.ArgumentParser:
+    """
+    Construir el parser de argumentos una sola vez.
+
+    La interfaz llama a main() en el mismo proceso para cada descarga masiva;
+    el parser no cambia entre llamadas y parse_args no lo modifica.
+
+    Returns:
+        Parser con todos los argumentos de la descarga masiva
     """
     parser = argparse.ArgumentParser(
         description="Zoom Video Downloader - Descarga masiva de grabaciones",
@@ -271,6 +766,9 @@ Ejemplos:
   python3 batch_downloader.py input/urls.txt all
   python3 batch_downloader.py input/urls.csv video
   python3 batch_downloader.py input/urls.txt audio --verbose
+  python3 batch_downloader.py input/urls.txt all --jobs 4
+  python3 batch_downloader.py input/urls.txt video --lotes 4
+  python3 batch_downloader.py input/urls.txt all --jobs 8 --rate-limit 5M
         """,
     )
 
@@ -281,8 +779,9 @@ Ejemplos:
     parser.add_argument(
         "tipo",
         nargs="?",
-        default="all",
-        choices=["video", "audio", "transcript", "all"],
+        default=TipoDescarga.TODO,
+        type=TipoDescarga,
+        choices=list(TipoDescarga),
         help="Tipo de descarga (default: all)",
     )
 
@@ -294,13 +793,100 @@ Ejemplos:
 
     parser.add_argument("--verbose", action="store_true", help="Modo verboso (debug)")
 
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Numero de descargas simultaneas "
+        "(default: descarga.max_paralelas de la configuracion)",
+    )
+
+    parser.add_argument(
+        "--rate-limit",
+        help="Limite de ancho de banda por descarga, por ejemplo 10M "
+        "(default: descarga.limite_velocidad de la configuracion)",
+    )
+
+    parser.add_argument(
+        "--lotes",
+        type=int,
+        default=0,
+        help="Repartir las URLs en N grupos y descargar cada grupo con una sola "
+        "ejecucion de yt-dlp (default: 0, una ejecucion por URL)",
+    )
+
     parser.add_argument(
         "--no-confirm",
         action="store_true",
         help="No pedir confirmacion antes de descargar",
     )
 
-    return parser.parse_args()
+    return parser
+
+
+def obtener_argumentos(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parsear argumentos de linea de comandos.
+
+    Args:
+        argv: Argumentos a parsear (por defecto los de sys.argv)
+
+    Returns:
+        Namespace con los argumentos parseados
+    """
+    return _crear_parser().parse_args(argv)
+
+
+def recoger_resultados(
+    grupos: Iterable[List[Tuple[str, str]]],
+    enviar: Callable[[List[Tuple[str, str]]], Future],
+    max_pendientes: int,
+    barra: BarraProgreso,
+    logger: logging.Logger,
+    al_completar: Optional[Callable[[str, str], None]] = None,
+) -> Tuple[int, int, List[Tuple[str, str]]]:
+    """
+    Ejecutar una ronda de descargas en el pool y contar sus resultados.
+
+    Args:
+        grupos: Grupos de tuplas (nombre, url); cada grupo es una tarea
+        enviar: Funcion que envia un grupo al pool (ver completar_en_paralelo)
+        max_pendientes: Numero maximo de grupos enviados y sin terminar
+        barra: Barra de progreso a actualizar por cada grabacion
+        logger: Logger para registrar eventos
+        al_completar: Funcion llamada con (nombre, url) por cada grabacion
+            descargada con exito, desde el hilo que recoge los resultados
+
+    Returns:
+        Tupla (completadas, exitosas, fallidas) con la lista de (nombre, url)
+        de las grabaciones que fallaron
+    """
+    completadas = 0
+    exitosas = 0
+    fallidas = []
+
+    for grupo, futuro in completar_en_paralelo(grupos, enviar, max_pendientes):
+        try:
+            resultado = futuro.result()
+        except Exception as e:
+            nombres = ", ".join(nombre for nombre, _ in grupo)
+            logger.error(f"Error inesperado descargando {nombres}: {e}")
+            resultado = False
+
+        if not isinstance(resultado, list):
+            resultado = [resultado] * len(grupo)
+
+        for (nombre, url), exito in zip(grupo, resultado):
+            completadas += 1
+            if exito:
+                exitosas += 1
+                if al_completar is not None:
+                    al_completar(nombre, url)
+            else:
+                fallidas.append((nombre, url))
+
+            barra.actualizar(completadas, f"{nombre}")
+
+    return completadas, exitosas, fallidas
 
 
 def mostrar_resumen(
@@ -315,33 +901,45 @@ def mostrar_resumen(
         fallidas: Numero de descargas fallidas
         logger: Logger para registrar eventos
     """
-    print("\n" + "=" * 50)
-    print("RESUMEN DE DESCARGA MASIVA")
-    print("=" * 50)
-    print(f"  Total procesadas: {total}")
-    print(f"  Exitosas: {exitosas}")
-    print(f"  Fallidas: {fallidas}")
-    print(
-        f"  Tasa de exito: {((exitosas / total) * 100):.1f}%"
-        if total > 0
-        else "  Tasa de exito: 0%"
+    tasa = f"{((exitosas / total) * 100):.1f}%" if total > 0 else "0%"
+    separador = "=" * 50
+    sys.stdout.write(
+        f"\n{separador}\n"
+        "RESUMEN DE DESCARGA MASIVA\n"
+        f"{separador}\n"
+        f"  Total procesadas: {total}\n"
+        f"  Exitosas: {exitosas}\n"
+        f"  Fallidas: {fallidas}\n"
+        f"  Tasa de exito: {tasa}\n"
+        f"{separador}\n"
     )
-    print("=" * 50)
+    sys.stdout.flush()
 
     logger.info(f"Resumen: {exitosas}/{total} descargas exitosas")
 
 
-def main() -> None:
+def main(argv: Optional[List[str]] = None) -> None:
     """
     Funcion principal del descargador masivo.
+
+    Args:
+        argv: Argumentos de linea de comandos (por defecto los de sys.argv)
     """
-    args = obtener_argumentos()
+    global _DEPENDENCIAS_LISTAS
+
+    args = obtener_argumentos(argv)
+    # Los hilos y los generadores de URLs usan estos valores en cada
+    # grabacion; se leen una sola vez del Namespace
+    tipo, lotes = args.tipo, args.lotes
 
     config = cargar_configuracion(args.config)
 
     if args.verbose:
         config["logging"]["nivel"] = "DEBUG"
 
+    if args.rate_limit:
+        config.setdefault("descarga", {})["limite_velocidad"] = args.rate_limit
+
     logger = inicializar_logging(config)
 
     logger.info("Iniciando Zoom Video Downloader - Descarga Masiva")
@@ -359,20 +957,35 @@ def main() -> None:
         logger.error(f"El archivo no existe: {archivo_path}")
         sys.exit(1)
 
-    urls = leer_urls_desde_archivo(str(archivo_path), logger)
+    # Sin una extension conocida no se podria comprobar ni mover el audio
+    if tipo in (TipoDescarga.AUDIO, TipoDescarga.TODO):
+        try:
+            extension_audio(config)
+        except ValueError as e:
+            logger.error(str(e))
+            sys.exit(1)
+
+    # El archivo se recorre a medida que avanzan las descargas; solo se
+    # adelantan las primeras grabaciones para la vista previa
+    urls = iterar_urls_desde_archivo(str(archivo_path), logger)
+    vista_previa = list(itertools.islice(urls, 6))
 
-    if not urls:
+    if not vista_previa:
         logger.error("No se encontraron URLs validas en el archivo")
         sys.exit(1)
 
-    print(f"\nSe procesaran {len(urls)} grabaciones")
-    print(f"Tipo de descarga: {args.tipo}")
-
-    for i, (nombre, url) in enumerate(urls[:5], 1):
-        print(f"  {i}. {nombre}: {url[:50]}...")
+    # Una sola escritura para toda la vista previa
+    lineas = [f"\nTipo de descarga: {tipo}", "Grabaciones a procesar:"]
+    lineas += [
+        f"  {i}. {nombre}: {url[:50]}..."
+        for i, (nombre, url) in enumerate(vista_previa[:5], 1)
+    ]
+    if len(vista_previa) > 5:
+        lineas.append("  ... y mas")
+    sys.stdout.write("\n".join(lineas) + "\n")
+    sys.stdout.flush()
 
-    if len(urls) > 5:
-        print(f"  ... y {len(urls) - 5} mas")
+    urls = itertools.chain(vista_previa, urls)
 
     if not args.no_confirm:
         confirm = input("\nContinuar? (s/N): ").strip().lower()
@@ -380,45 +993,152 @@ def main() -> None:
             print("Descarga cancelada")
             sys.exit(0)
 
-    crear_directorios(config)
-
-    barra = BarraProgreso(len(urls), prefix="Descargando", longitud=40)
+    # Comprobaciones unicas antes de lanzar los hilos de descarga
+    if not instalar_dependencias(logger):
+        logger.error("No se pudo instalar yt-dlp")
+        sys.exit(1)
 
-    exitosas = 0
-    fallidas = 0
-    fallidas_detalles = []
+    if tipo in (TipoDescarga.AUDIO, TipoDescarga.TODO) and not verificar_ffmpeg(
+        logger
+    ):
+        logger.warning("ffmpeg no disponible: la extraccion de audio puede fallar")
 
-    for i, (nombre, url) in enumerate(urls, 1):
-        barra.actualizar(i, f"{nombre}")
+    existentes = listar_archivos_existentes(crear_directorios(config))
+    _DEPENDENCIAS_LISTAS = True
 
-        if ejecutar_descarga(url, args.tipo, nombre, config, logger):
-            exitosas += 1
-        else:
-            fallidas += 1
-            fallidas_detalles.append((nombre, url))
+    plantilla = preparar_plantilla_comando(tipo, config)
 
-    barra.finalizar()
+    # Las grabaciones descargadas en ejecuciones anteriores no llegan al pool
+    with RegistroDescargas(
+        os.path.join(
+            config.get("descargas", {}).get("directorio_base", "downloads"),
+            "descargas.sqlite",
+        )
+    ) as registro:
+        ya_descargadas = [0]
+
+        def filtrar_descargadas(urls):
+            for nombre, url in urls:
+                if registro.completada(url, tipo):
+                    ya_descargadas[0] += 1
+                    continue
+                yield nombre, url
+
+        urls = filtrar_descargadas(urls)
+
+        def anotar_descarga(nombre: str, url: str) -> None:
+            tipo_archivos = plantilla[2]
+            _, ruta, _ = construir_comando_yt_dlp(
+                url, tipo, sanitizar_nombre_archivo(nombre), config, plantilla
+            )
+            if tipo_archivos == TipoDescarga.TRANSCRIPCION:
+                ruta = None
+            registro.marcar(url, tipo, ruta)
 
-    mostrar_resumen(len(urls), exitosas, fallidas, logger)
+        trabajos = max(
+            1, args.jobs or config.get("descarga", {}).get("max_paralelas", 4)
+        )
 
-    if fallidas_detalles and config.get("descarga", {}).get(
-        "reintentar_descargas_fallidas", False
-    ):
-        print("\nReintentando descargas fallidas...")
-        reintentos_fallidos = []
-        for nombre, url in fallidas_detalles:
-            if ejecutar_descarga(url, args.tipo, nombre, config, logger):
-                exitosas += 1
-                fallidas -= 1
+        with ThreadPoolExecutor(max_workers=trabajos) as executor:
+
+            def enviar_url(grupo):
+                nombre, url = grupo[0]
+                return executor.submit(
+                    ejecutar_descarga,
+                    url,
+                    tipo,
+                    nombre,
+                    config,
+                    logger,
+                    existentes,
+                    plantilla,
+                )
+
+            def enviar_lote(grupo):
+                return executor.submit(
+                    ejecutar_descarga_lote,
+                    grupo,
+                    tipo,
+                    config,
+                    logger,
+                    existentes,
+                    plantilla,
+                )
+
+            if lotes > 0:
+                # Repartir en grupos exige conocer todas las URLs
+                urls = list(urls)
+                barra = BarraProgreso(
+                    len(urls), prefix="Descargando", longitud=40, intervalo_minimo=0.2
+                )
+                grupos = [urls[i :: lotes] for i in range(min(lotes, len(urls)))]
+                enviar = enviar_lote
             else:
-                reintentos_fallidos.append((nombre, url))
-
-        if reintentos_fallidos:
-            print(f"\nDescargas que siguen fallando: {len(reintentos_fallidos)}")
-            for nombre, url in reintentos_fallidos:
-                logger.error(f"No se pudo descargar: {nombre} ({url})")
-
-    if exitosas > 0:
+                barra = BarraProgreso(
+                    None, prefix="Descargando", longitud=40, intervalo_minimo=0.2
+                )
+                grupos = ([(nombre, url)] for nombre, url in urls)
+                enviar = enviar_url
+
+            # Los hilos solo encolan sus mensajes; un unico hilo los escribe
+            # (main() tambien se ejecuta desde la interfaz: ante una interrupcion
+            # el logger debe recuperar sus manejadores)
+            oyente = iniciar_registro_en_cola(logger)
+            try:
+                completadas, exitosas, fallidas_detalles = recoger_resultados(
+                    grupos, enviar, 2 * trabajos, barra, logger, anotar_descarga
+                )
+            finally:
+                detener_registro_en_cola(logger, oyente)
+            barra.finalizar()
+
+            mostrar_resumen(completadas, exitosas, len(fallidas_detalles), logger)
+
+            if fallidas_detalles and config.get("descarga", {}).get(
+                "reintentar_descargas_fallidas", False
+            ):
+                # Segunda ronda en el mismo pool, tras una espera mayor que la
+                # de los reintentos individuales para dar tiempo a Zoom
+                opciones = opciones_reintento(config)
+                espera = min(
+                    opciones["max_espera"],
+                    opciones["intervalo_base"] * 2 ** opciones["max_reintentos"],
+                )
+                print(f"\nReintentando descargas fallidas en {espera:.0f} segundos...")
+                time.sleep(espera)
+
+                barra = BarraProgreso(
+                    len(fallidas_detalles),
+                    prefix="Reintentando",
+                    longitud=40,
+                    intervalo_minimo=0.2,
+                )
+                oyente = iniciar_registro_en_cola(logger)
+                try:
+                    _, recuperadas, reintentos_fallidos = recoger_resultados(
+                        ([(nombre, url)] for nombre, url in fallidas_detalles),
+                        enviar_url,
+                        2 * trabajos,
+                        barra,
+                        logger,
+                        anotar_descarga,
+                    )
+                finally:
+                    detener_registro_en_cola(logger, oyente)
+                barra.finalizar()
+                exitosas += recuperadas
+
+                if reintentos_fallidos:
+                    print(
+                        f"\nDescargas que siguen fallando: {len(reintentos_fallidos)}"
+                    )
+                    for nombre, url in reintentos_fallidos:
+                        logger.error(f"No se pudo descargar: {nombre} ({url})")
+
+    if ya_descargadas[0]:
+        logger.info(f"Omitidas {ya_descargadas[0]} grabaciones ya descargadas")
+
+    if exitosas + ya_descargadas[0] > 0:
         logger.info("Descarga masiva completada")
         sys.exit(0)
     else:
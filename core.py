@@ -8,13 +8,14 @@ de descarga de grabaciones de Zoom.
 
 Funcionalidades:
 - Instalacion automatica de dependencias
-- Conversion de video a audio
+- Conversion de video a audio (individual o por lotes)
 - Sanitizacion de nombres de archivo
 - Extraccion de IDs de video
 - Validacion de URLs
 - Sistema de logging
 - Reintentos con backoff exponencial
 - Barra de progreso visual
+- Ejecucion de descargas en paralelo con un pool de hilos
 - Conversiones de formato
 
 Autor: Zoom Video Downloader
@@ -24,15 +25,100 @@ Version: 2.0.0
 import os
 import sys
 import re
+import copy
 import time
 import yaml
+import queue
+import random
+import shutil
 import logging
+import logging.handlers
+import functools
+import itertools
+import threading
 import subprocess
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    as_completed,
+    wait,
+)
 from pathlib import Path
-from typing import Optional, Dict, Any, Tuple, List
+from typing import Optional, Dict, Any, Tuple, List, Set, Iterable, Iterator, Callable
+from enum import Enum
 from datetime import datetime
 from urllib.parse import urlparse
 
+# Analizador YAML en C (libyaml) si PyYAML se compilo con el
+try:
+    from yaml import CSafeLoader as _CargadorYaml
+except ImportError:
+    from yaml import SafeLoader as _CargadorYaml
+
+# Serializacion de metadatos: orjson (en C) si esta instalado
+try:
+    import orjson
+
+    def _a_json(obj: Any) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+
+    _desde_json = orjson.loads
+except ImportError:
+    import json
+
+    def _a_json(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+    _desde_json = json.loads
+
+# Serializa las escrituras en metadatos.jsonl entre descargas paralelas
+_BLOQUEO_METADATOS = threading.Lock()
+
+# Expresiones regulares precompiladas (se usan una o mas veces por URL)
+_RE_ID_ZOOM = re.compile(r"/rec/play/([^?]+)")
+_RE_URL_ZOOM = re.compile(r"https://zoom\.us/rec/play/([^?]+)")
+_RE_PROGRESO_YT_DLP = re.compile(r"\[download\]\s+(\d+(?:\.\d+)?)%")
+_RE_ESPACIOS = re.compile(r"\s+")
+# Algo que sanitizar_nombre_archivo cambiaria: caracter no valido, varios
+# espacios seguidos o un espacio que no es " " (tabulador, salto de linea...)
+_RE_NOMBRE_A_CORREGIR = re.compile(r'[<>:"/\\|?*]|\s{2,}|[^\S ]')
+# Cabecera, marcas de tiempo y flechas de un VTT en una sola pasada; todo es
+# ASCII, asi que se trabaja sobre bytes sin decodificar el archivo
+_RE_CONVERSION_VTT = re.compile(rb"WEBVTT|(\d{2}:\d{2}:\d{2})\.(\d{3})|-->\s*")
+
+# Caracteres no validos en nombres de archivo, sustituidos con str.translate
+_TABLA_CARACTERES_INVALIDOS = str.maketrans(dict.fromkeys('<>:"/\\|?*', "_"))
+
+# Unidades de formatear_tamano, una cada 1024 (10 bits)
+_UNIDADES_TAMANO = ("B", "KB", "MB", "GB", "TB")
+
+# Extension del archivo que deja yt-dlp (--audio-format) para cada formato de
+# video.formato_audio; no siempre coincide con el nombre del formato
+_EXTENSIONES_AUDIO = {
+    "mp3": ".mp3",
+    "aac": ".m4a",
+    "m4a": ".m4a",
+    "alac": ".m4a",
+    "opus": ".opus",
+    "vorbis": ".ogg",
+    "flac": ".flac",
+    "wav": ".wav",
+}
+
+# Estructuras de descarga ya creadas en este proceso, por rutas absolutas
+_DIRECTORIOS_CREADOS: Set[Tuple[str, ...]] = set()
+
+# Contenido ya leido de cada archivo de configuracion, por (ruta, mtime)
+_CACHE_CONFIGURACION: Dict[Tuple[str, int], Any] = {}
+
+# Linea de un archivo de URLs (ya sin espacios en los extremos): titulo
+# opcional hasta la primera coma, URL ASCII de Zoom e ID de la grabacion
+_RE_LINEA_URLS = re.compile(
+    rb"(?:([^,]*),\s*)?"
+    rb"(https://zoom\.us/rec/play/([\x21-\x3e\x40-\x7e]+)[\x21-\x7e]*)\Z"
+)
+
 
 def cargar_configuracion(ruta_archivo: str = "config.yaml") -> Dict[str, Any]:
     """
@@ -63,6 +149,8 @@ def cargar_configuracion(ruta_archivo: str = "config.yaml") -> Dict[str, Any]:
             "maximos": 3,
             "intervalo_segundos": 5,
             "tiempo_espera_porcentaje": 0.1,
+            "max_espera_segundos": 30,
+            "variacion": 0.5,
         },
         "logging": {
             "archivo": "downloads/descargas.log",
@@ -74,15 +162,24 @@ def cargar_configuracion(ruta_archivo: str = "config.yaml") -> Dict[str, Any]:
             "timeout_segundos": 300,
             "tamano_buffer": 8192,
             "reintentar_descargas_fallidas": True,
+            "max_paralelas": 4,
+            "fragmentos_paralelos": 4,
+            "bloque_http": "10M",
+            "limite_velocidad": None,
         },
     }
 
     try:
-        with open(ruta_archivo, "r", encoding="utf-8") as f:
-            config = yaml.safe_load(f)
-            if config:
-                config_predeterminada.update(config)
-            return config_predeterminada
+        # El YAML solo se analiza de nuevo si el archivo ha cambiado; cada
+        # llamada recibe su propia copia porque los scripts la modifican
+        clave = (os.path.abspath(ruta_archivo), os.stat(ruta_archivo).st_mtime_ns)
+        if clave not in _CACHE_CONFIGURACION:
+            with open(ruta_archivo, "r", encoding="utf-8") as f:
+                _CACHE_CONFIGURACION[clave] = yaml.load(f, Loader=_CargadorYaml)
+        config = copy.deepcopy(_CACHE_CONFIGURACION[clave])
+        if config:
+            config_predeterminada.update(config)
+        return config_predeterminada
     except FileNotFoundError:
         return config_predeterminada
     except Exception as e:
@@ -112,12 +209,33 @@ def inicializar_logging(config: Dict[str, Any]) -> logging.Logger:
     nivel = nivel_map.get(config.get("logging", {}).get("nivel", "INFO"), logging.INFO)
     logger.setLevel(nivel)
 
+    # Si ya se inicializo (otro script importo core) solo se ajusta el nivel;
+    # anadir otra vez los manejadores duplicaria cada mensaje
+    if logger.handlers:
+        for manejador in logger.handlers:
+            manejador.setLevel(nivel)
+        return logger
+
+    # Los mensajes no pasan ademas por los manejadores del logger raiz
+    logger.propagate = False
+
     archivo_log = config.get("logging", {}).get("archivo", "downloads/descargas.log")
     formato = config.get("logging", {}).get(
         "formato", "[%(asctime)s] %(levelname)s: %(message)s"
     )
 
-    fh = logging.FileHandler(archivo_log, encoding="utf-8")
+    # El archivo rota al llegar a 10 MB y no se abre hasta el primer mensaje.
+    # Cada registro se escribe al momento: si el proceso muere, el log
+    # conserva todo lo anterior (las descargas masivas ya lo escriben desde
+    # un hilo aparte, ver iniciar_registro_en_cola)
+    Path(archivo_log).parent.mkdir(parents=True, exist_ok=True)
+    fh = logging.handlers.RotatingFileHandler(
+        archivo_log,
+        maxBytes=10 * 1024 * 1024,
+        backupCount=3,
+        encoding="utf-8",
+        delay=True,
+    )
     fh.setLevel(nivel)
 
     ch = logging.StreamHandler()
@@ -133,6 +251,74 @@ def inicializar_logging(config: Dict[str, Any]) -> logging.Logger:
     return logger
 
 
+class _ManejadorColaAcotada(logging.handlers.QueueHandler):
+    """QueueHandler que descarta el registro mas antiguo si la cola esta llena."""
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        while True:
+            try:
+                self.queue.put_nowait(record)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+
+class _OyenteCola(logging.handlers.QueueListener):
+    """QueueListener cuya senal de parada espera hueco en la cola acotada."""
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+def iniciar_registro_en_cola(
+    logger: logging.Logger, capacidad: int = 1024
+) -> logging.handlers.QueueListener:
+    """
+    Desviar los registros del logger a una cola atendida por un solo hilo.
+
+    Los hilos de descarga solo encolan el registro y no esperan a que se
+    escriba en la terminal o en el archivo. La cola es acotada: si se
+    llena, se descartan los registros mas antiguos.
+
+    Args:
+        logger: Logger devuelto por inicializar_logging
+        capacidad: Numero maximo de registros pendientes
+
+    Returns:
+        QueueListener en marcha (ver detener_registro_en_cola)
+    """
+    cola = queue.Queue(maxsize=capacidad)
+    manejadores = list(logger.handlers)
+    for manejador in manejadores:
+        logger.removeHandler(manejador)
+
+    oyente = _OyenteCola(cola, *manejadores, respect_handler_level=True)
+    logger.addHandler(_ManejadorColaAcotada(cola))
+    oyente.start()
+    return oyente
+
+
+def detener_registro_en_cola(
+    logger: logging.Logger, oyente: logging.handlers.QueueListener
+) -> None:
+    """
+    Vaciar la cola de registros y volver a escribir directamente.
+
+    Args:
+        logger: Logger pasado a iniciar_registro_en_cola
+        oyente: QueueListener devuelto por iniciar_registro_en_cola
+    """
+    oyente.stop()
+    for manejador in list(logger.handlers):
+        if isinstance(manejador, _ManejadorColaAcotada):
+            logger.removeHandler(manejador)
+    for manejador in oyente.handlers:
+        logger.addHandler(manejador)
+
+
 class Colores:
     """
     Codes de color para salida en terminal.
@@ -156,6 +342,11 @@ class Colores:
     FONDO_AMARILLO = "\033[43m"
 
 
+# Los codigos ANSI solo tienen sentido en un terminal; con la salida
+# redirigida a un archivo o a un pipe se escribe el texto sin ellos
+_USAR_COLORES = sys.stdout is not None and sys.stdout.isatty()
+
+
 def imprimir_texto(
     texto: str, color: str = "", logger: Optional[logging.Logger] = None
 ) -> None:
@@ -167,11 +358,31 @@ def imprimir_texto(
         color: Code de color (opcional)
         logger: Logger para registrar (opcional)
     """
-    print(f"{color}{texto}{Colores.RESET}")
+    if _USAR_COLORES:
+        print(f"{color}{texto}{Colores.RESET}")
+    else:
+        print(texto)
     if logger:
         logger.info(texto)
 
 
+class TipoDescarga(str, Enum):
+    """
+    Tipos de descarga admitidos.
+
+    Hereda de str para que cada miembro sea igual a su valor ("video",
+    "audio"...) y pueda usarse como clave o texto sin conversiones.
+    """
+
+    VIDEO = "video"
+    AUDIO = "audio"
+    TRANSCRIPCION = "transcript"
+    TODO = "all"
+
+    def __str__(self) -> str:
+        return self.value
+
+
 def crear_directorios(config: Dict[str, Any]) -> Dict[str, Path]:
     """
     Crear estructura de directorios para descargas.
@@ -190,12 +401,51 @@ def crear_directorios(config: Dict[str, Any]) -> Dict[str, Path]:
         "transcripcion": base / config["descargas"]["transcripcion"],
     }
 
-    for path in dirs.values():
-        path.mkdir(parents=True, exist_ok=True)
+    # En una descarga masiva se llama una vez por grabacion o lote: si la
+    # estructura ya se creo y sus carpetas siguen ahi no se vuelve a crear
+    # (la interfaz encadena descargas y el usuario puede borrar alguna)
+    clave_cache = tuple(os.path.abspath(ruta) for ruta in dirs.values())
+    if clave_cache in _DIRECTORIOS_CREADOS and all(
+        os.path.isdir(ruta) for ruta in clave_cache[1:]
+    ):
+        return dirs
+
+    # Solo la base puede necesitar padres; las subcarpetas cuelgan de ella
+    base.mkdir(parents=True, exist_ok=True)
+    for clave in ("video", "audio", "transcripcion"):
+        dirs[clave].mkdir(exist_ok=True)
+    _DIRECTORIOS_CREADOS.add(clave_cache)
 
     return dirs
 
 
+def extension_audio(config: Dict[str, Any]) -> str:
+    """
+    Obtener la extension del audio que genera yt-dlp segun la configuracion.
+
+    Con m4a, yt-dlp copia la pista AAC de la grabacion de Zoom sin
+    recodificarla (-c:a copy), en lugar de pasar por libmp3lame.
+
+    Args:
+        config: Configuracion del programa
+
+    Returns:
+        Extension con punto, por ejemplo ".mp3"
+
+    Raises:
+        ValueError: Si formato_audio no tiene una extension fija (por
+            ejemplo "best", que conserva la del codec de origen)
+    """
+    formato = str(config.get("video", {}).get("formato_audio", "mp3")).lower()
+    try:
+        return _EXTENSIONES_AUDIO[formato]
+    except KeyError:
+        raise ValueError(
+            f"formato_audio no soportado: {formato} "
+            f"(validos: {', '.join(_EXTENSIONES_AUDIO)})"
+        ) from None
+
+
 def sanitizar_nombre_archivo(nombre: str, limite: int = 50) -> str:
     """
     Sanitizar nombre de archivo para que sea valido en todos los sistemas operativos.
@@ -207,8 +457,17 @@ def sanitizar_nombre_archivo(nombre: str, limite: int = 50) -> str:
     Returns:
         Nombre sanitizado
     """
-    nombre_sanitizado = re.sub(r'[<>:"/\\|?*]', "_", nombre)
-    nombre_sanitizado = re.sub(r"\s+", " ", nombre_sanitizado).strip()
+    # Caso habitual: el titulo ya es valido y se devuelve sin copiarlo
+    if (
+        nombre
+        and len(nombre) <= limite
+        and nombre == nombre.strip()
+        and not _RE_NOMBRE_A_CORREGIR.search(nombre)
+    ):
+        return nombre
+
+    nombre_sanitizado = nombre.translate(_TABLA_CARACTERES_INVALIDOS)
+    nombre_sanitizado = _RE_ESPACIOS.sub(" ", nombre_sanitizado).strip()
 
     if len(nombre_sanitizado) > limite:
         nombre_sanitizado = nombre_sanitizado[:limite].strip()
@@ -226,7 +485,7 @@ def extraer_id_video(zoom_url: str) -> Optional[str]:
     Returns:
         ID de la grabacion o None si no se encuentra
     """
-    match = re.search(r"/rec/play/([^?]+)", zoom_url)
+    match = _RE_ID_ZOOM.search(zoom_url)
     return match.group(1) if match else None
 
 
@@ -240,32 +499,59 @@ def validar_url_zoom(url: str) -> Tuple[bool, Optional[str]]:
     Returns:
         Tupla (es_valida, id_video)
     """
-    if not url.startswith("https://zoom.us/rec/"):
-        return False, None
-
-    video_id = extraer_id_video(url)
-    if not video_id:
+    # Una sola coincidencia anclada comprueba el prefijo y captura el ID
+    coincidencia = _RE_URL_ZOOM.match(url)
+    if not coincidencia:
         return False, None
 
-    return True, video_id
+    return True, coincidencia.group(1)
 
 
+@functools.lru_cache(maxsize=None)
 def verificar_sudo() -> bool:
     """
     Verificar si el comando sudo esta disponible y funciona.
 
+    El resultado se memoriza durante la vida del proceso, de modo que
+    sudo solo se lanza la primera vez.
+
     Returns:
         True si sudo esta disponible
     """
     try:
         subprocess.run(
-            ["sudo", "-n", "true"], check=True, capture_output=True, timeout=5
+            ["sudo", "-n", "true"],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=5,
         )
         return True
-    except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+    except (
+        FileNotFoundError,
+        subprocess.CalledProcessError,
+        subprocess.TimeoutExpired,
+    ):
         return False
 
 
+@functools.lru_cache(maxsize=None)
+def herramienta_disponible(comando: str) -> bool:
+    """
+    Comprobar si un ejecutable esta disponible en el PATH.
+
+    Usa shutil.which (solo consulta el sistema de archivos, sin lanzar
+    procesos) y memoriza el resultado durante la vida del proceso.
+
+    Args:
+        comando: Nombre del ejecutable (yt-dlp, ffmpeg...)
+
+    Returns:
+        True si el ejecutable se encuentra en el PATH
+    """
+    return shutil.which(comando) is not None
+
+
 def instalar_dependencias(logger: logging.Logger) -> bool:
     """
     Instalar yt-dlp si no esta disponible.
@@ -276,26 +562,27 @@ def instalar_dependencias(logger: logging.Logger) -> bool:
     Returns:
         True si se instalo correctamente o ya existia
     """
-    try:
-        subprocess.run(["yt-dlp", "--version"], check=True, capture_output=True)
+    if herramienta_disponible("yt-dlp"):
         return True
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        logger.info("Instalando yt-dlp...")
-        try:
-            resultado = subprocess.run(
-                [sys.executable, "-m", "pip", "install", "yt-dlp"],
-                capture_output=True,
-                text=True,
-            )
-            if resultado.returncode == 0:
-                logger.info("yt-dlp instalado correctamente")
-                return True
-            else:
-                logger.error(f"Error instalando yt-dlp: {resultado.stderr}")
-                return False
-        except Exception as e:
-            logger.error(f"Error instalando yt-dlp: {e}")
+
+    logger.info("Instalando yt-dlp...")
+    try:
+        resultado = subprocess.run(
+            [sys.executable, "-m", "pip", "install", "yt-dlp"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        if resultado.returncode == 0:
+            herramienta_disponible.cache_clear()
+            logger.info("yt-dlp instalado correctamente")
+            return True
+        else:
+            logger.error(f"Error instalando yt-dlp: {resultado.stderr}")
             return False
+    except Exception as e:
+        logger.error(f"Error instalando yt-dlp: {e}")
+        return False
 
 
 def verificar_ffmpeg(logger: logging.Logger) -> bool:
@@ -308,12 +595,11 @@ def verificar_ffmpeg(logger: logging.Logger) -> bool:
     Returns:
         True si esta disponible
     """
-    try:
-        subprocess.run(["ffmpeg", "-version"], check=True, capture_output=True)
+    if herramienta_disponible("ffmpeg"):
         return True
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        logger.warning("ffmpeg no encontrado, intentando instalar...")
-        return instalar_ffmpeg(logger)
+
+    logger.warning("ffmpeg no encontrado, intentando instalar...")
+    return instalar_ffmpeg(logger)
 
 
 def instalar_ffmpeg(logger: logging.Logger) -> bool:
@@ -335,10 +621,18 @@ def instalar_ffmpeg(logger: logging.Logger) -> bool:
 
     try:
         logger.info("Instalando ffmpeg...")
-        subprocess.run(["sudo", "apt", "update"], check=True, capture_output=True)
-        subprocess.run(
-            ["sudo", "apt", "install", "-y", "ffmpeg"], check=True, capture_output=True
-        )
+        # Solo se registra el codigo de salida, la salida de apt no se usa
+        for cmd in (
+            ["sudo", "apt", "update"],
+            ["sudo", "apt", "install", "-y", "ffmpeg"],
+        ):
+            subprocess.run(
+                cmd,
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        herramienta_disponible.cache_clear()
         logger.info("ffmpeg instalado correctamente")
         return True
     except subprocess.CalledProcessError as e:
@@ -347,6 +641,124 @@ def instalar_ffmpeg(logger: logging.Logger) -> bool:
         return False
 
 
+def ejecutar_proceso(
+    cmd: List[str],
+    lineas_error: int = 50,
+    filtro: Optional[Callable[[str], bool]] = None,
+) -> subprocess.CompletedProcess:
+    """
+    Ejecutar un comando externo leyendo su stderr en streaming.
+
+    La salida estandar se descarta y de stderr solo se conservan las
+    ultimas lineas, de modo que la memoria no crece con la duracion
+    del proceso (yt-dlp y ffmpeg escriben progreso continuamente).
+
+    Args:
+        cmd: Comando y argumentos a ejecutar
+        lineas_error: Numero de lineas finales de stderr a conservar
+        filtro: Si se indica, stdout se lee junto con stderr y cada linea
+            se le pasa; las lineas para las que devuelve True (por ejemplo
+            las de progreso) no se conservan
+
+    Returns:
+        CompletedProcess con el codigo de salida y el final de stderr
+    """
+    ultimas = deque(maxlen=lineas_error)
+    with subprocess.Popen(
+        cmd,
+        stdout=subprocess.DEVNULL if filtro is None else subprocess.PIPE,
+        stderr=subprocess.PIPE if filtro is None else subprocess.STDOUT,
+        text=True,
+        errors="replace",
+        bufsize=1 << 20,
+    ) as proceso:
+        for linea in proceso.stderr if filtro is None else proceso.stdout:
+            if filtro is None or not filtro(linea):
+                ultimas.append(linea)
+    return subprocess.CompletedProcess(
+        cmd, proceso.returncode, stdout=None, stderr="".join(ultimas)
+    )
+
+
+class _RegistroYtDlp:
+    """Logger minimo para YoutubeDL que solo conserva las ultimas lineas de error."""
+
+    def __init__(self, lineas_error: int = 50):
+        self.errores = deque(maxlen=lineas_error)
+
+    def debug(self, mensaje: str) -> None:
+        pass
+
+    def info(self, mensaje: str) -> None:
+        pass
+
+    def warning(self, mensaje: str) -> None:
+        pass
+
+    def error(self, mensaje: str) -> None:
+        self.errores.append(mensaje)
+
+
+def ejecutar_yt_dlp(
+    cmd: List[str], progreso: Optional[Callable[[float], None]] = None
+) -> subprocess.CompletedProcess:
+    """
+    Ejecutar un comando de yt-dlp dentro del propio proceso.
+
+    Si yt_dlp se puede importar, los argumentos del comando se interpretan
+    con yt_dlp.parse_options y la descarga se hace con YoutubeDL, evitando
+    arrancar un interprete nuevo por cada URL. Si no, se lanza el ejecutable
+    con ejecutar_proceso.
+
+    Args:
+        cmd: Comando de yt-dlp (el primer elemento es el ejecutable)
+        progreso: Funcion que recibe el porcentaje descargado (0-100)
+
+    Returns:
+        CompletedProcess con el codigo de salida y los ultimos errores
+    """
+    try:
+        import yt_dlp
+    except ImportError:
+        if progreso is None:
+            return ejecutar_proceso(cmd)
+
+        # Con --newline cada actualizacion de progreso es una linea propia
+        def filtrar_progreso(linea: str) -> bool:
+            coincidencia = _RE_PROGRESO_YT_DLP.match(linea)
+            if coincidencia:
+                progreso(float(coincidencia.group(1)))
+            return coincidencia is not None
+
+        return ejecutar_proceso(cmd + ["--newline"], filtro=filtrar_progreso)
+
+    registro = _RegistroYtDlp()
+    try:
+        opciones = yt_dlp.parse_options(cmd[1:])
+    except SystemExit as e:
+        return subprocess.CompletedProcess(cmd, e.code or 2, stdout=None, stderr="")
+
+    ydl_opts = dict(opciones.ydl_opts, quiet=True, noprogress=True, logger=registro)
+    if progreso is not None:
+
+        def avisar_progreso(estado: Dict[str, Any]) -> None:
+            total = estado.get("total_bytes") or estado.get("total_bytes_estimate")
+            if estado.get("status") == "downloading" and total:
+                progreso(100.0 * estado.get("downloaded_bytes", 0) / total)
+
+        ydl_opts["progress_hooks"] = [avisar_progreso]
+
+    try:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            codigo = ydl.download(opciones.urls)
+    except yt_dlp.utils.DownloadError:
+        codigo = 1
+
+    return subprocess.CompletedProcess(
+        cmd, codigo, stdout=None, stderr="\n".join(registro.errores)
+    )
+
+
 def convertir_a_mp3(
     video_path: str, audio_path: str, logger: logging.Logger, config: Dict[str, Any]
 ) -> bool:
@@ -369,19 +781,29 @@ def convertir_a_mp3(
 
     try:
         logger.info(f"Convirtiendo {video_path} a MP3...")
+        # Solo audio: -vn evita decodificar el video y -threads 0 deja a
+        # ffmpeg usar todos los nucleos para codificar el MP3
         cmd = [
             "ffmpeg",
+            "-hide_banner",
+            "-loglevel",
+            "error",
             "-i",
             video_path,
+            "-vn",
+            "-threads",
+            "0",
+            "-c:a",
+            "libmp3lame",
             "-q:a",
-            calidad_audio,
+            str(calidad_audio),
             "-map",
             "a",
             "-y",
             audio_path,
         ]
 
-        resultado = subprocess.run(cmd, capture_output=True, text=True)
+        resultado = ejecutar_proceso(cmd)
 
         if resultado.returncode == 0:
             logger.info(f"Conversion completada: {audio_path}")
@@ -400,6 +822,8 @@ def reintentar_con_backoff(
     max_reintentos: int = 3,
     intervalo_base: float = 5.0,
     logger: Optional[logging.Logger] = None,
+    max_espera: Optional[float] = None,
+    variacion: float = 0.0,
 ) -> Tuple[bool, Any]:
     """
     Ejecutar funcion con reintentos y backoff exponencial.
@@ -409,6 +833,9 @@ def reintentar_con_backoff(
         max_reintentos: Numero maximo de reintentos
         intervalo_base: Intervalo base entre reintentos (segundos)
         logger: Logger para registrar eventos
+        max_espera: Tope de la espera entre reintentos (segundos); None sin tope
+        variacion: Fraccion aleatoria (+/-) aplicada a cada espera para que
+            varios hilos no reintenten a la vez (0.5 = +/-50%)
 
     Returns:
         Tupla (exito, resultado)
@@ -424,9 +851,16 @@ def reintentar_con_backoff(
                 logger.warning(f"Intento {intento}/{max_reintentos} fallido: {e}")
 
             if intento < max_reintentos:
+                espera = intervalo
+                if variacion:
+                    espera *= 1 + random.uniform(-variacion, variacion)
+                # El tope se aplica despues de la variacion para que sea un
+                # maximo real
+                if max_espera is not None:
+                    espera = min(max_espera, espera)
                 if logger:
-                    logger.info(f"Reintentando en {intervalo:.1f} segundos...")
-                time.sleep(intervalo)
+                    logger.info(f"Reintentando en {espera:.1f} segundos...")
+                time.sleep(espera)
                 intervalo *= 2
             else:
                 if logger:
@@ -439,37 +873,79 @@ def reintentar_con_backoff(
 class BarraProgreso:
     """
     Barra de progreso visual en terminal.
+
+    Con total None (numero de elementos desconocido) solo se muestra
+    el contador de completados y la velocidad.
     """
 
     def __init__(
         self,
-        total: int,
+        total: Optional[int],
         prefix: str = "",
         longitud: int = 40,
         fill: str = "█",
         vacio: str = "░",
+        intervalo_minimo: float = 0.05,
     ):
         self.total = total
         self.prefix = prefix
         self.longitud = longitud
         self.fill = fill
         self.vacio = vacio
+        self.intervalo_minimo = intervalo_minimo
+        # Solo hay longitud + 1 barras posibles; se construyen una vez
+        self._barras = [
+            fill * bloques + vacio * (longitud - bloques)
+            for bloques in range(longitud + 1)
+        ]
         self.completado = 0
         self.inicio = time.time()
+        self._ultimo_dibujo = 0.0
+        self._info_pendiente = None
+        self._ultima_linea = ""
+        self._bloqueo = threading.Lock()
 
     def actualizar(self, completado: int, info: str = "") -> None:
         """
         Actualizar el estado de la barra de progreso.
 
+        Si desde el ultimo dibujo han pasado menos de intervalo_minimo
+        segundos (50 ms por defecto) solo se guarda el estado; el ultimo
+        elemento y finalizar siempre dibujan. Se puede llamar desde varios
+        hilos a la vez.
+
         Args:
             completado: Numero de elementos completados
             info: Informacion adicional a mostrar
         """
+        with self._bloqueo:
+            self._actualizar(completado, info)
+
+    def _actualizar(self, completado: int, info: str) -> None:
         self.completado = completado
 
+        ahora = time.monotonic()
+        if (
+            ahora - self._ultimo_dibujo < self.intervalo_minimo
+            and completado != self.total
+        ):
+            self._info_pendiente = info
+            return
+        self._ultimo_dibujo = ahora
+        self._info_pendiente = None
+
+        if not self.total:
+            elapsed = time.time() - self.inicio
+            velocidad = self.completado / elapsed if elapsed > 0 else 0
+            self._escribir(
+                f"\r{self.prefix} ({self.completado} completadas) "
+                f"- {velocidad:.2f}/s {info}"
+            )
+            return
+
         porcentaje = self.completado / self.total
         bloques = int(porcentaje * self.longitud)
-        barra = self.fill * bloques + self.vacio * (self.longitud - bloques)
+        barra = self._barras[min(bloques, self.longitud)]
 
         elapsed = time.time() - self.inicio
         velocidad = self.completado / elapsed if elapsed > 0 else 0
@@ -480,15 +956,19 @@ class BarraProgreso:
         else:
             tiempo_restante = "?"
 
-        print(
+        self._escribir(
             f"\r{self.prefix} |{barra}| "
             f"{porcentaje:.0%} "
             f"({self.completado}/{self.total}) "
-            f"- {tiempo_restante} {info}",
-            end="",
-            flush=True,
+            f"- {tiempo_restante} {info}"
         )
 
+    def _escribir(self, linea: str) -> None:
+        # Una linea identica a la anterior no se vuelve a enviar al terminal
+        if linea != self._ultima_linea:
+            self._ultima_linea = linea
+            print(linea, end="", flush=True)
+
     def finalizar(self, mensaje: str = "") -> None:
         """
         Finalizar la barra de progreso.
@@ -496,11 +976,55 @@ class BarraProgreso:
         Args:
             mensaje: Mensaje final a mostrar
         """
+        if self._info_pendiente is not None:
+            self._ultimo_dibujo = 0.0
+            self.actualizar(self.completado, self._info_pendiente)
         print()
         if mensaje:
             print(mensaje)
 
 
+def completar_en_paralelo(
+    tareas: Iterable[Any],
+    enviar: Callable[[Any], Future],
+    max_pendientes: int,
+) -> Iterator[Tuple[Any, Future]]:
+    """
+    Enviar tareas a un pool sin adelantar mas de max_pendientes a la vez.
+
+    Las tareas se consumen de forma perezosa, de modo que un iterador muy
+    largo (por ejemplo el de iterar_urls_desde_archivo) no se carga entero
+    en memoria antes de empezar a descargar.
+
+    Args:
+        tareas: Iterable de tareas
+        enviar: Funcion que envia una tarea al pool y devuelve su Future
+        max_pendientes: Numero maximo de tareas enviadas y sin terminar
+
+    Yields:
+        Tuplas (tarea, futuro) en el orden en que terminan
+    """
+    pendientes = {}
+    for tarea in tareas:
+        if len(pendientes) >= max_pendientes:
+            terminados, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                yield pendientes.pop(futuro), futuro
+        pendientes[enviar(tarea)] = tarea
+
+    for futuro in as_completed(list(pendientes)):
+        yield pendientes.pop(futuro), futuro
+
+
+def _convertir_fragmento_vtt(coincidencia: "re.Match[bytes]") -> bytes:
+    if coincidencia.group(1):
+        # 00:00:01.500 -> 00:00:01,500
+        return coincidencia.group(1) + b"," + coincidencia.group(2)
+    if coincidencia.group(0) == b"WEBVTT":
+        return b""
+    return b" --> "
+
+
 def convertir_vtt_a_srt(ruta_vtt: str, logger: logging.Logger) -> Optional[str]:
     """
     Convertir archivo VTT a SRT.
@@ -515,17 +1039,9 @@ def convertir_vtt_a_srt(ruta_vtt: str, logger: logging.Logger) -> Optional[str]:
     try:
         ruta_srt = ruta_vtt.replace(".vtt", ".srt")
 
-        with open(ruta_vtt, "r", encoding="utf-8") as f:
-            contenido = f.read()
-
-        contenido = contenido.replace("WEBVTT", "")
-        contenido = contenido.replace(".000", ".000")
-        contenido = re.sub(r"(\d{2}:\d{2}:\d{2})\.(\d{3})", r"\1,\2", contenido)
-
-        contenido = re.sub(r"-->\s*", " --> ", contenido)
-
-        with open(ruta_srt, "w", encoding="utf-8") as f:
-            f.write(contenido)
+        contenido = Path(ruta_vtt).read_bytes()
+        contenido = _RE_CONVERSION_VTT.sub(_convertir_fragmento_vtt, contenido)
+        Path(ruta_srt).write_bytes(contenido)
 
         logger.info(f"Convertido: {ruta_vtt} -> {ruta_srt}")
         return ruta_srt
@@ -561,12 +1077,10 @@ def formatear_tamano(tamano_bytes: float) -> str:
     Returns:
         Cadena formateada (KB, MB, GB)
     """
-    for unidad in ["B", "KB", "MB", "GB"]:
-        if abs(tamano_bytes) < 1024.0:
-            return f"{tamano_bytes:.1f} {unidad}"
-        tamano_bytes /= 1024.0
-
-    return f"{tamano_bytes:.1f} TB"
+    # Cada unidad son 10 bits mas: la longitud en bits elige la unidad
+    # sin recorrerlas una a una
+    indice = min(max(int(abs(tamano_bytes)).bit_length() - 1, 0) // 10, 4)
+    return f"{tamano_bytes / (1 << (10 * indice)):.1f} {_UNIDADES_TAMANO[indice]}"
 
 
 def guardar_metadatos(
@@ -577,7 +1091,7 @@ def guardar_metadatos(
     logger: logging.Logger,
 ) -> None:
     """
-    Guardar metadatos de la descarga en archivo JSON.
+    Anadir los metadatos de la descarga al archivo JSONL.
 
     Args:
         nombre: Nombre del video
@@ -586,17 +1100,7 @@ def guardar_metadatos(
         rutas_archivos: Dict con rutas de archivos descargados
         logger: Logger para registrar eventos
     """
-    import json
-
-    archivo_metadatos = Path("downloads/metadatos.json")
-
-    metadatos = {}
-    try:
-        if archivo_metadatos.exists():
-            with open(archivo_metadatos, "r", encoding="utf-8") as f:
-                metadatos = json.load(f)
-    except Exception as e:
-        logger.warning(f"No se pudieron leer metadatos anteriores: {e}")
+    archivo_metadatos = Path("downloads/metadatos.jsonl")
 
     entrada = {
         "nombre": nombre,
@@ -607,75 +1111,133 @@ def guardar_metadatos(
     }
 
     for tipo_archivo, ruta in rutas_archivos.items():
-        tamano = obtener_tamano_archivo(ruta)
+        # Un solo stat por archivo da el tamano y la fecha de modificacion
+        try:
+            estado = os.stat(ruta)
+            tamano = estado.st_size
+            modificado = datetime.fromtimestamp(estado.st_mtime).isoformat()
+        except OSError:
+            tamano = modificado = None
         entrada["archivos"][tipo_archivo] = {
             "ruta": ruta,
             "tamano_bytes": tamano,
             "tamano_formateado": formatear_tamano(tamano) if tamano else "desconocido",
+            "fecha_modificacion": modificado,
         }
 
-    if "descargas" not in metadatos:
-        metadatos["descargas"] = []
-
-    metadatos["descargas"].append(entrada)
-
+    # Una linea por descarga: no hace falta leer ni reescribir lo anterior
+    linea = _a_json(entrada) + "\n"
     try:
-        with open(archivo_metadatos, "w", encoding="utf-8") as f:
-            json.dump(metadatos, f, indent=2, ensure_ascii=False)
+        with _BLOQUEO_METADATOS:
+            with open(archivo_metadatos, "a", encoding="utf-8") as f:
+                f.write(linea)
         logger.info("Metadatos guardados")
     except Exception as e:
         logger.error(f"Error guardando metadatos: {e}")
 
 
-def leer_urls_desde_archivo(
+def leer_metadatos(
+    ruta_archivo: str = "downloads/metadatos.jsonl",
+) -> Iterator[Dict[str, Any]]:
+    """
+    Recorrer las entradas guardadas por guardar_metadatos.
+
+    Las lineas que no son JSON valido (por ejemplo una escritura cortada)
+    se ignoran.
+
+    Args:
+        ruta_archivo: Ruta del archivo JSONL de metadatos
+
+    Yields:
+        Dict con los metadatos de cada descarga, en orden de escritura
+    """
+    try:
+        with open(ruta_archivo, "r", encoding="utf-8") as f:
+            for linea in f:
+                try:
+                    yield _desde_json(linea)
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        return
+
+
+def iterar_urls_desde_archivo(
     ruta_archivo: str, logger: logging.Logger
-) -> List[Tuple[str, str]]:
+) -> Iterator[Tuple[str, str]]:
     """
-    Leer y procesar URLs de Zoom desde archivos TXT o CSV.
+    Recorrer las URLs de Zoom de un archivo TXT o CSV a medida que se leen.
+
+    Cada linea puede ser "titulo,url" o solo la URL (nombrada video_N por
+    su numero de linea). Las grabaciones repetidas (mismo ID de Zoom) solo
+    se incluyen una vez.
 
     Args:
         ruta_archivo: Ruta al archivo a procesar
         logger: Logger para registrar eventos
 
-    Returns:
-        Lista de tuplas (nombre, url)
+    Yields:
+        Tuplas (nombre, url)
     """
-    urls = []
+    leidas = 0
+    vistos = set()
+    duplicadas = 0
 
     try:
-        with open(ruta_archivo, "r", encoding="utf-8") as f:
-            contenido = f.read().strip()
-
-        if not contenido:
-            logger.warning("El archivo esta vacio")
-            return []
-
-        if "," in contenido:
-            lineas = contenido.split("\n")
-            for i, linea in enumerate(lineas):
-                if "," in linea:
-                    partes = linea.split(",", 1)
-                    if len(partes) >= 2:
-                        nombre = sanitizar_nombre_archivo(partes[0].strip())
-                        url = partes[1].strip()
-                        es_valida, _ = validar_url_zoom(url)
-                        if es_valida:
-                            urls.append((nombre, url))
-        else:
-            lineas = contenido.split("\n")
-            for i, linea in enumerate(lineas):
-                linea = linea.strip()
-                es_valida, _ = validar_url_zoom(linea)
-                if es_valida:
-                    nombre = f"video_{i + 1}"
-                    urls.append((nombre, linea))
+        # Lectura binaria: las URLs son ASCII, asi que solo se decodifican
+        # las lineas aceptadas (y el titulo del CSV, que si puede ser UTF-8)
+        with open(ruta_archivo, "rb") as f:
+            # Las lineas en blanco iniciales no cuentan para numerar los videos
+            lineas = itertools.dropwhile(
+                lambda linea: not linea, (linea.strip() for linea in f)
+            )
 
-        logger.info(f"Leidas {len(urls)} URLs validas de {ruta_archivo}")
-        return urls
+            # Cada linea se interpreta por separado: "titulo,url" (CSV) o solo
+            # la URL (TXT), de modo que se admiten archivos mezclados
+            numero = 0
+            for numero, linea in enumerate(lineas, 1):
+                coincidencia = _RE_LINEA_URLS.match(linea)
+                if not coincidencia:
+                    continue
+                titulo, url, video_id = coincidencia.groups()
+                if video_id in vistos:
+                    duplicadas += 1
+                    continue
+                vistos.add(video_id)
+                if titulo is not None:
+                    nombre = sanitizar_nombre_archivo(
+                        titulo.strip().decode("utf-8", errors="replace")
+                    )
+                else:
+                    nombre = f"video_{numero}"
+                leidas += 1
+                yield nombre, url.decode("ascii")
+
+            if not numero:
+                logger.warning("El archivo esta vacio")
+                return
+
+        if duplicadas:
+            logger.info(f"Omitidas {duplicadas} URLs duplicadas")
+        logger.info(f"Leidas {leidas} URLs validas de {ruta_archivo}")
 
     except FileNotFoundError:
         logger.error(f"No se encontro el archivo: {ruta_archivo}")
-        return []
     except Exception as e:
         logger.error(f"Error leyendo archivo: {e}")
-        return []
+
+
+def leer_urls_desde_archivo(
+    ruta_archivo: str, logger: logging.Logger
+) -> List[Tuple[str, str]]:
+    """
+    Leer y procesar URLs de Zoom desde archivos TXT o CSV.
+
+    Args:
+        ruta_archivo: Ruta al archivo a procesar
+        logger: Logger para registrar eventos
+
+    Returns:
+        Lista de tuplas (nombre, url) (ver iterar_urls_desde_archivo)
+    """
+    return list(iterar_urls_desde_archivo(ruta_archivo, logger))
@@ -31,9 +31,72 @@ Licencia: MIT
 
 import os
 import sys
-import subprocess
-import glob
-from pathlib import Path
+import heapq
+import itertools
+from datetime import datetime
+from operator import itemgetter
+
+try:
+    # Edicion de linea e historial en los input() de los menus
+    import readline  # noqa: F401
+except ImportError:
+    pass
+
+# Prefijos aceptados para las grabaciones de Zoom
+_ZOOM_PREFIXES = ("https://zoom.us/rec/",)
+
+
+def _is_zoom_url(url):
+    """
+    Comprobar si una URL apunta a una grabacion de Zoom.
+
+    Args:
+        url (str): URL introducida por el usuario
+
+    Returns:
+        bool: True si empieza por alguno de los prefijos de Zoom
+    """
+    return url.startswith(_ZOOM_PREFIXES)
+
+
+# Tipos de descarga en el orden en que se ofrecen en el menu
+_TYPE_MAP = ("video", "audio", "transcript", "all")
+_TYPE_MENU_STR = (
+    "\nTIPO DE DESCARGA:\n"
+    "1. Video (MP4)\n"
+    "2. Audio (MP3)\n"
+    "3. Transcripcion (SRT)\n"
+    "4. Todo (video + audio + transcripcion)\n"
+    "0. Volver\n"
+)
+
+# Archivos de input/ que se listan como maximo (los mas recientes)
+_MAX_INPUT_FILES = 50
+
+# Cursor al inicio, borrar pantalla y borrar el historial de desplazamiento
+_CLEAR_SCREEN = "\x1b[H\x1b[2J\x1b[3J"
+
+
+def _supports_ansi():
+    """
+    Comprobar si la terminal interpreta secuencias de escape ANSI.
+
+    En Windows activa antes el procesado VT de la consola (Windows 10+).
+
+    Returns:
+        bool: True si se puede limpiar la pantalla escribiendo el escape
+    """
+    if sys.stdout is None or not sys.stdout.isatty():
+        return False
+    if os.name != "nt":
+        return True
+
+    os.system("")
+    return (
+        "WT_SESSION" in os.environ
+        or "ANSICON" in os.environ
+        or sys.getwindowsversion().major >= 10
+    )
 
 
 class ZoomDownloaderInterface:
@@ -53,10 +116,43 @@ class ZoomDownloaderInterface:
         interface.run()
     """
 
+    __slots__ = ("input_dir", "downloads_dir", "_sd", "_bd", "_dir_cache", "_ansi")
+
+    # Textos fijos de los menus, compuestos una sola vez y escritos de golpe
+    _HEADER = "\n".join(
+        [
+            "=" * 60,
+            "     ZOOM VIDEO DOWNLOADER - INTERFAZ INTERACTIVA",
+            "=" * 60,
+            "Descarga grabaciones de Zoom de forma sencilla",
+            "",
+            "",
+        ]
+    )
+    _MAIN_MENU = "\n".join(
+        [
+            "MENU PRINCIPAL:",
+            "1. Descargar URL individual",
+            "2. Descargar desde archivo (masivo)",
+            "3. Ver archivos en carpeta input/",
+            "4. Ver estado de descargas",
+            "5. Limpiar archivos temporales",
+            "6. Ayuda",
+            "0. Salir",
+            "",
+            "",
+        ]
+    )
+
     def __init__(self):
         """Inicializar la interfaz y crear directorios necesarios."""
         self.input_dir = "input"
         self.downloads_dir = "downloads"
+        self._sd = None
+        self._bd = None
+        # Listados de directorios por ruta: (st_mtime_ns, nombres de archivo)
+        self._dir_cache = {}
+        self._ansi = _supports_ansi()
         self.ensure_directories()
 
     def ensure_directories(self):
@@ -70,38 +166,38 @@ class ZoomDownloaderInterface:
         - downloads/MP3/: audios extraidos
         - downloads/SRT/: transcripciones
         """
-        for directory in [
-            self.input_dir,
-            self.downloads_dir,
-            "downloads/MP4",
-            "downloads/MP3",
-            "downloads/SRT",
-        ]:
-            os.makedirs(directory, exist_ok=True)
+        # Se lista cada nivel una vez y solo se crea lo que falta
+        for parent, names in (
+            (".", (self.input_dir, self.downloads_dir)),
+            (self.downloads_dir, ("MP4", "MP3", "SRT")),
+        ):
+            try:
+                with os.scandir(parent) as entries:
+                    existing = {entry.name for entry in entries if entry.is_dir()}
+            except FileNotFoundError:
+                existing = set()
+
+            for name in names:
+                if name not in existing:
+                    os.makedirs(os.path.join(parent, name), exist_ok=True)
 
     def clear_screen(self):
         """Limpiar pantalla para mejor experiencia visual."""
-        os.system("cls" if os.name == "nt" else "clear")
+        if self._ansi:
+            sys.stdout.write(_CLEAR_SCREEN)
+            sys.stdout.flush()
+        else:
+            os.system("cls" if os.name == "nt" else "clear")
 
     def show_header(self):
         """Mostrar encabezado del programa."""
-        print("=" * 60)
-        print("     ZOOM VIDEO DOWNLOADER - INTERFAZ INTERACTIVA")
-        print("=" * 60)
-        print("Descarga grabaciones de Zoom de forma sencilla")
-        print()
+        sys.stdout.write(self._HEADER)
+        sys.stdout.flush()
 
     def show_main_menu(self):
         """Mostrar menu principal con opciones disponibles."""
-        print("MENU PRINCIPAL:")
-        print("1. Descargar URL individual")
-        print("2. Descargar desde archivo (masivo)")
-        print("3. Ver archivos en carpeta input/")
-        print("4. Ver estado de descargas")
-        print("5. Limpiar archivos temporales")
-        print("6. Ayuda")
-        print("0. Salir")
-        print()
+        sys.stdout.write(self._MAIN_MENU)
+        sys.stdout.flush()
 
     def get_user_choice(self, max_option):
         """
@@ -119,7 +215,9 @@ class ZoomDownloaderInterface:
         while True:
             try:
                 choice = input("Selecciona una opcion: ").strip()
-                if choice.isdigit():
+                # isdigit() tambien acepta cifras no ASCII como "\u00b2", que
+                # int() rechaza
+                if choice.isascii() and choice.isdigit():
                     choice_num = int(choice)
                     if 0 <= choice_num <= max_option:
                         return choice_num
@@ -144,22 +242,39 @@ class ZoomDownloaderInterface:
         print("\nARCHIVOS DISPONIBLES EN input/:")
         print("-" * 40)
 
-        files = []
-        extensions = ["*.txt", "*.csv"]
-
-        for ext in extensions:
-            files.extend(glob.glob(os.path.join(self.input_dir, ext)))
+        # El tamano se toma del DirEntry del propio recorrido. No se usa
+        # _dir_cache: editar un archivo no cambia el mtime del directorio y
+        # el tamano mostrado quedaria desfasado
+        try:
+            with os.scandir(self.input_dir) as entries:
+                files = sorted(
+                    (
+                        entry
+                        for entry in entries
+                        if entry.is_file()
+                        and entry.name.lower().endswith((".txt", ".csv"))
+                    ),
+                    key=lambda entry: entry.name,
+                )
+        except FileNotFoundError:
+            files = []
 
         if not files:
             print("No hay archivos .txt o .csv en la carpeta input/")
             print("Puedes crear archivos con URLs de Zoom para descargar")
             return []
 
-        for i, file in enumerate(files, 1):
-            file_size = os.path.getsize(file)
-            print(f"{i}. {os.path.basename(file)} ({file_size} bytes)")
+        total = len(files)
+        if total > _MAX_INPUT_FILES:
+            files = heapq.nlargest(
+                _MAX_INPUT_FILES, files, key=lambda entry: entry.stat().st_mtime
+            )
+            print(f"... mostrando los {_MAX_INPUT_FILES} mas recientes de {total}")
+
+        for i, entry in enumerate(files, 1):
+            print(f"{i}. {entry.name} ({entry.stat().st_size} bytes)")
 
-        return files
+        return [os.path.join(self.input_dir, entry.name) for entry in files]
 
     def preview_file_content(self, file_path):
         """
@@ -172,20 +287,46 @@ class ZoomDownloaderInterface:
         print("-" * 50)
 
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-
-            print(f"Total de lineas: {len(lines)}")
+            # Solo se decodifican las primeras lineas; el resto del archivo
+            # se cuenta por bloques sin cargarlo entero en memoria
+            with open(file_path, "rb") as f:
+                head = [line.decode("utf-8") for line in itertools.islice(f, 5)]
+                total = len(head)
+                last = b"\n"
+                block = f.read(1 << 20)
+                while block:
+                    total += block.count(b"\n")
+                    last = block[-1:]
+                    block = f.read(1 << 20)
+                if last != b"\n":
+                    total += 1
+
+            print(f"Total de lineas: {total}")
             print("\nPrimeras 5 lineas:")
-            for i, line in enumerate(lines[:5], 1):
+            for i, line in enumerate(head, 1):
                 print(f"{i}. {line.strip()}")
 
-            if len(lines) > 5:
-                print(f"... y {len(lines) - 5} lineas mas")
+            if total > 5:
+                print(f"... y {total - 5} lineas mas")
 
         except Exception as e:
             print(f"Error leyendo el archivo: {e}")
 
+    def _ask_download_type(self):
+        """
+        Preguntar el tipo de descarga.
+
+        Returns:
+            str: Tipo elegido, o None si el usuario elige 0 para volver
+        """
+        sys.stdout.write(_TYPE_MENU_STR)
+        sys.stdout.flush()
+
+        choice = self.get_user_choice(len(_TYPE_MAP))
+        if choice == 0:
+            return None
+        return _TYPE_MAP[choice - 1]
+
     def download_individual(self):
         """
         Menu para descargar una URL individual.
@@ -203,19 +344,13 @@ class ZoomDownloaderInterface:
             print("URL no valida")
             return
 
-        if not url.startswith("https://zoom.us/rec/"):
+        if not _is_zoom_url(url):
             print("Error: La URL debe ser de Zoom (https://zoom.us/rec/)")
             return
 
-        print("\nTIPO DE DESCARGA:")
-        print("1. Video (MP4)")
-        print("2. Audio (MP3)")
-        print("3. Transcripcion (SRT)")
-        print("4. Todo (video + audio + transcripcion)")
-
-        choice = self.get_user_choice(4)
-        types = {1: "video", 2: "audio", 3: "transcript", 4: "all"}
-        download_type = types[choice]
+        download_type = self._ask_download_type()
+        if download_type is None:
+            return
 
         custom_name = input("Nombre personalizado (opcional): ").strip()
         if not custom_name:
@@ -223,6 +358,7 @@ class ZoomDownloaderInterface:
 
         print(f"\nIniciando descarga...")
         self.run_simple_downloader(url, download_type, custom_name)
+        self._dir_cache.clear()
 
     def download_from_file(self):
         """
@@ -252,18 +388,80 @@ class ZoomDownloaderInterface:
         if confirm not in ["s", "si", "si", "y", "yes"]:
             return
 
-        print("\nTIPO DE DESCARGA:")
-        print("1. Video (MP4)")
-        print("2. Audio (MP3)")
-        print("3. Transcripcion (SRT)")
-        print("4. Todo (video + audio + transcripcion)")
-
-        choice = self.get_user_choice(4)
-        types = {1: "video", 2: "audio", 3: "transcript", 4: "all"}
-        download_type = types[choice]
+        download_type = self._ask_download_type()
+        if download_type is None:
+            return
 
         print(f"\nIniciando descarga masiva...")
         self.run_batch_downloader(selected_file, download_type)
+        self._dir_cache.clear()
+
+    def _cached_listdir(self, path, exts):
+        """
+        Listar los archivos de un directorio con las extensiones dadas.
+
+        El listado se guarda junto al mtime del directorio; mientras no se
+        creen, borren o renombren archivos se sirve desde memoria sin volver
+        a recorrerlo.
+
+        Args:
+            path (str): Directorio a listar
+            exts (set): Extensiones aceptadas, en minusculas y sin punto
+
+        Returns:
+            list: Nombres de archivo ordenados ([] si el directorio no existe)
+        """
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            self._dir_cache.pop(path, None)
+            return []
+
+        cached = self._dir_cache.get(path)
+        if cached is None or cached[0] != mtime:
+            with os.scandir(path) as entries:
+                names = sorted(entry.name for entry in entries if entry.is_file())
+            cached = self._dir_cache[path] = (mtime, names)
+
+        return [
+            name
+            for name in cached[1]
+            if os.path.splitext(name)[1][1:].lower() in exts
+        ]
+
+    def _count_files(self, dirpath, exts):
+        """
+        Contar los archivos de un directorio segun su extension.
+
+        Args:
+            dirpath (str): Directorio a recorrer
+            exts (set): Extensiones aceptadas, en minusculas y sin punto
+
+        Returns:
+            int: Numero de archivos (0 si el directorio no existe)
+        """
+        return len(self._cached_listdir(dirpath, exts))
+
+    def _walk_stats(self, root):
+        """
+        Recorrer recursivamente un directorio.
+
+        Args:
+            root (str): Directorio raiz
+
+        Yields:
+            tuple: (tamano, mtime, ruta) de cada archivo
+        """
+        try:
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        yield from self._walk_stats(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        yield st.st_size, st.st_mtime, entry.path
+        except OSError:
+            return
 
     def show_download_status(self):
         """
@@ -281,46 +479,54 @@ class ZoomDownloaderInterface:
             print("No hay descargas realizadas")
             return
 
-        mp4_count = len(glob.glob("downloads/MP4/*.mp4"))
-        mp3_count = len(glob.glob("downloads/MP3/*.mp3"))
-        srt_count = len(glob.glob("downloads/SRT/*.{srt,vtt}"))
+        mp4_count = self._count_files(os.path.join(self.downloads_dir, "MP4"), {"mp4"})
+        mp3_count = self._count_files(os.path.join(self.downloads_dir, "MP3"), {"mp3"})
+        srt_count = self._count_files(
+            os.path.join(self.downloads_dir, "SRT"), {"srt", "vtt"}
+        )
 
         print(f"Videos (MP4): {mp4_count} archivos")
         print(f"Audios (MP3): {mp3_count} archivos")
         print(f"Transcripciones: {srt_count} archivos")
 
-        try:
-            total_size = (
-                subprocess.check_output(
-                    ["du", "-sh", self.downloads_dir], stderr=subprocess.DEVNULL
-                )
-                .decode()
-                .split()[0]
-            )
-            print(f"Tamano total: {total_size}")
-        except Exception:
-            pass
+        from core import formatear_tamano
+
+        # Un solo recorrido del arbol da el tamano total y los mas recientes
+        total_size = 0
+        entries = []
+        for size, mtime, path in self._walk_stats(self.downloads_dir):
+            total_size += size
+            entries.append((mtime, path))
+
+        print(f"Tamano total: {formatear_tamano(total_size)}")
 
         print("\nARCHIVOS RECIENTES:")
+        for mtime, path in heapq.nlargest(5, entries, key=itemgetter(0)):
+            fecha = datetime.fromtimestamp(mtime).strftime("%Y-%m-%d %H:%M")
+            print(f"  {fecha} {path}")
+
+    def _rm_parts(self, root):
+        """
+        Borrar recursivamente los archivos .part de un directorio.
+
+        Args:
+            root (str): Directorio a limpiar
+
+        Returns:
+            int: Numero de archivos eliminados
+        """
+        removed = 0
         try:
-            result = subprocess.run(
-                [
-                    "find",
-                    self.downloads_dir,
-                    "-type",
-                    "f",
-                    "-printf",
-                    "%TY-%Tm-%Td %TH:%TM %p\n",
-                ],
-                capture_output=True,
-                text=True,
-            )
-            if result.stdout:
-                lines = result.stdout.strip().split("\n")[:5]
-                for line in lines:
-                    print(f"  {line}")
-        except Exception:
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        removed += self._rm_parts(entry.path)
+                    elif entry.is_file() and entry.name.endswith(".part"):
+                        os.unlink(entry.path)
+                        removed += 1
+        except FileNotFoundError:
             pass
+        return removed
 
     def clean_temp_files(self):
         """
@@ -337,16 +543,36 @@ class ZoomDownloaderInterface:
         if confirm not in ["s", "si", "si", "y", "yes"]:
             return
 
-        part_files = glob.glob("downloads/**/*.part", recursive=True)
-        for file in part_files:
-            os.remove(file)
+        # Los archivos sueltos se borran aqui y cada subcarpeta (MP4, MP3,
+        # SRT...) se recorre en su propio hilo
+        removed = 0
+        subdirs = []
+        try:
+            with os.scandir(self.downloads_dir) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file() and entry.name.endswith(".part"):
+                        os.unlink(entry.path)
+                        removed += 1
+        except FileNotFoundError:
+            pass
+
+        if subdirs:
+            from concurrent.futures import ThreadPoolExecutor
 
-        print(f"Eliminados {len(part_files)} archivos .part")
+            with ThreadPoolExecutor(max_workers=min(8, len(subdirs))) as executor:
+                removed += sum(executor.map(self._rm_parts, subdirs))
+
+        print(f"Eliminados {removed} archivos .part")
 
         if os.path.exists("venv"):
-            subprocess.run(["rm", "-rf", "venv"])
+            import shutil
+
+            shutil.rmtree("venv", ignore_errors=True)
             print("Eliminado entorno virtual")
 
+        self._dir_cache.clear()
         print("Limpieza completada")
 
     def show_help(self):
@@ -396,6 +622,26 @@ class ZoomDownloaderInterface:
             download_type (str): Tipo de descarga
             custom_name (str, optional): Nombre personalizado
         """
+        # El modulo se importa una sola vez y la descarga se hace en este
+        # proceso; si no se puede importar se lanza el script como antes
+        if self._sd is None:
+            try:
+                import simple_zoom_downloader
+
+                self._sd = simple_zoom_downloader
+            except ImportError:
+                self._sd = False
+
+        if self._sd:
+            try:
+                if not self._sd.descargar(url, download_type, custom_name):
+                    print("Error en la descarga")
+            except Exception as e:
+                print(f"Error en la descarga: {e}")
+            return
+
+        import subprocess
+
         cmd = ["python3", "simple_zoom_downloader.py", url, download_type]
         if custom_name:
             cmd.append(custom_name)
@@ -415,6 +661,28 @@ class ZoomDownloaderInterface:
             file_path (str): Ruta del archivo con URLs
             download_type (str): Tipo de descarga
         """
+        # Igual que la descarga individual: el lote corre en este proceso
+        # (con su propio grupo de hilos) en lugar de lanzar otro interprete
+        if self._bd is None:
+            try:
+                import batch_downloader
+
+                self._bd = batch_downloader
+            except ImportError:
+                self._bd = False
+
+        if self._bd:
+            try:
+                self._bd.main([file_path, download_type])
+            except SystemExit as e:
+                if e.code:
+                    print("Error en la descarga masiva")
+            except Exception as e:
+                print(f"Error en la descarga masiva: {e}")
+            return
+
+        import subprocess
+
         cmd = ["python3", "batch_downloader.py", file_path, download_type]
 
         try:
@@ -23,22 +23,25 @@ Autor: Zoom Video Downloader
 Version: 2.0.0
 """
 
+import os
 import sys
-import subprocess
+import shutil
 import argparse
+import functools
 import logging
-from typing import Dict, Any, Optional
+from types import MappingProxyType
+from typing import Dict, Any, Optional, Callable, List, Mapping, Tuple
 from pathlib import Path
 
 from core import (
     cargar_configuracion,
     inicializar_logging,
     crear_directorios,
+    extension_audio,
     sanitizar_nombre_archivo,
     validar_url_zoom,
     instalar_dependencias,
     verificar_ffmpeg,
-    convertir_a_mp3,
     convertir_vtt_a_srt,
     BarraProgreso,
     reintentar_con_backoff,
@@ -46,11 +49,152 @@ from core import (
     formatear_tamano,
     Colores,
     imprimir_texto,
+    ejecutar_yt_dlp,
 )
 
 
+# Se activa tras la primera comprobacion correcta de yt-dlp, para que las
+# descargas siguientes del mismo proceso (la interfaz interactiva llama a
+# descargar() varias veces) no la repitan
+_DEPENDENCIAS_LISTAS = False
+
+# Tamano que se muestra para un archivo que no existe
+_TAMANO_CERO = formatear_tamano(0)
+
+# Inicio de todos los comandos de yt-dlp
+_PREFIJO_YT_DLP = ("yt-dlp", "--no-warnings")
+
+ConstructorComando = Callable[[str, str], Tuple[List[str], str, str]]
+
+
+def preparar_despacho(config: Dict[str, Any]) -> Mapping[str, ConstructorComando]:
+    """
+    Preparar los constructores de comandos de yt-dlp para una configuracion.
+
+    Las carpetas y opciones se resuelven una sola vez; cada constructor solo
+    completa la URL y el nombre de salida. El resultado se guarda por los
+    valores de configuracion que usa, de modo que las descargas siguientes
+    (la interfaz carga la configuracion en cada una) lo reutilizan.
+
+    Args:
+        config: Configuracion del programa
+
+    Returns:
+        Diccionario de solo lectura tipo -> funcion(url, nombre_salida) que
+        devuelve la tupla (comando, ruta_salida, tipo_archivos)
+    """
+    dirs = config["descargas"]
+    video_config = config.get("video", {})
+    descarga_config = config.get("descarga", {})
+
+    # La ruta de salida sigue al formato elegido (m4a copia la pista AAC de
+    # Zoom sin recodificar); sin extension conocida no se ofrece el tipo audio
+    try:
+        extension = extension_audio(config)
+    except ValueError:
+        extension = None
+
+    bloque_http = descarga_config.get("bloque_http", "10M")
+    return _crear_despacho(
+        str(dirs["directorio_base"]),
+        str(dirs["video"]),
+        str(dirs["audio"]),
+        str(dirs["transcripcion"]),
+        str(video_config.get("formato_preferido", "mp4")),
+        str(video_config.get("formato_audio", "mp3")),
+        str(video_config.get("calidad_audio", "0")),
+        bool(video_config.get("convertir_audio", True)),
+        str(config.get("transcripcion", {}).get("idiomas", "all")),
+        str(descarga_config.get("fragmentos_paralelos", 4)),
+        str(bloque_http) if bloque_http else None,
+        extension,
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _crear_despacho(
+    directorio_base: str,
+    carpeta_video: str,
+    carpeta_audio: str,
+    carpeta_transcripcion: str,
+    formato_preferido: str,
+    formato_audio: str,
+    calidad_audio: str,
+    convertir_audio: bool,
+    idiomas: str,
+    fragmentos_paralelos: str,
+    bloque_http: Optional[str],
+    extension: Optional[str],
+) -> Mapping[str, ConstructorComando]:
+    base = Path(directorio_base)
+    dir_video = str(base / carpeta_video)
+    dir_audio = str(base / carpeta_audio)
+    dir_transcripcion = str(base / carpeta_transcripcion)
+
+    formato_video = f"best[ext={formato_preferido}]/best"
+    opciones_audio = ("--audio-format", formato_audio, "--audio-quality", calidad_audio)
+    opciones_subtitulos = ("--write-subs", "--write-auto-subs", "--sub-langs", idiomas)
+
+    # Comun a todos los tipos: fragmentos HLS en paralelo y peticiones por
+    # rangos cuando la grabacion es un unico archivo
+    prefijo = _PREFIJO_YT_DLP + ("--concurrent-fragments", fragmentos_paralelos)
+    if bloque_http:
+        prefijo += ("--http-chunk-size", bloque_http)
+
+    # La parte fija de cada comando se compone aqui una vez; por grabacion
+    # solo se calculan las rutas y se copia la tupla en una lista nueva
+    fijos_video = (*prefijo, "--format", formato_video)
+    fijos_audio = (*prefijo, "--extract-audio", *opciones_audio)
+    fijos_transcripcion = (*prefijo, *opciones_subtitulos, "--skip-download")
+    fijos_todo = (*prefijo, "--format", formato_video)
+    if convertir_audio:
+        fijos_todo += ("--extract-audio", "--keep-video", *opciones_audio)
+    fijos_todo += opciones_subtitulos
+
+    def comando_video(url: str, nombre_salida: str) -> Tuple[List[str], str, str]:
+        ruta_salida = os.path.join(dir_video, f"{nombre_salida}.mp4")
+        return [*fijos_video, "--output", ruta_salida, url], ruta_salida, "video"
+
+    def comando_audio(url: str, nombre_salida: str) -> Tuple[List[str], str, str]:
+        ruta_salida = os.path.join(dir_audio, nombre_salida + extension)
+        plantilla = os.path.join(dir_audio, f"{nombre_salida}.%(ext)s")
+        return [*fijos_audio, "--output", plantilla, url], ruta_salida, "audio"
+
+    def comando_transcripcion(
+        url: str, nombre_salida: str
+    ) -> Tuple[List[str], str, str]:
+        ruta_base = os.path.join(dir_transcripcion, nombre_salida)
+        cmd = [*fijos_transcripcion, "--output", ruta_base, url]
+        return cmd, ruta_base, "transcript"
+
+    def comando_todo(url: str, nombre_salida: str) -> Tuple[List[str], str, str]:
+        # Una sola pasada: yt-dlp extrae el audio con su postprocesador de
+        # ffmpeg (--keep-video conserva el MP4) y deja los subtitulos en la
+        # carpeta de transcripciones
+        ruta_video = os.path.join(dir_video, f"{nombre_salida}.mp4")
+        subtitulos = "subtitle:" + os.path.join(
+            dir_transcripcion, f"{nombre_salida}.%(ext)s"
+        )
+        cmd = [*fijos_todo, "--output", ruta_video, "--output", subtitulos, url]
+        return cmd, ruta_video, "all"
+
+    despacho = {
+        "video": comando_video,
+        "transcript": comando_transcripcion,
+        "all": comando_todo,
+    }
+    if extension is not None:
+        despacho["audio"] = comando_audio
+    # Se comparte entre descargas: de solo lectura para que nadie lo altere
+    return MappingProxyType(despacho)
+
+
 def construir_comando_yt_dlp(
-    url: str, tipo: str, nombre_salida: str, config: Dict[str, Any]
+    url: str,
+    tipo: str,
+    nombre_salida: str,
+    config: Dict[str, Any],
+    despacho: Optional[Mapping[str, ConstructorComando]] = None,
 ) -> tuple:
     """
     Construir comando de yt-dlp segun el tipo de descarga.
@@ -60,89 +204,21 @@ def construir_comando_yt_dlp(
         tipo: Tipo de descarga (video, audio, transcript, all)
         nombre_salida: Nombre base para el archivo de salida
         config: Configuracion del programa
+        despacho: Resultado de preparar_despacho para la misma
+            configuracion; si es None se toma de preparar_despacho, que lo
+            reutiliza mientras la configuracion no cambie
 
     Returns:
         Tupla (comando, ruta_salida, tipo_archivos)
     """
-    dirs = config["descargas"]
-    video_config = config.get("video", {})
-    transcript_config = config.get("transcripcion", {})
+    if despacho is None:
+        despacho = preparar_despacho(config)
 
-    if tipo == "video":
-        ruta_salida = str(
-            Path(dirs["directorio_base"]) / dirs["video"] / f"{nombre_salida}.mp4"
-        )
-        cmd = [
-            "yt-dlp",
-            "--no-warnings",
-            "--format",
-            f"best[ext={video_config.get('formato_preferido', 'mp4')}]/best",
-            "--output",
-            ruta_salida,
-            url,
-        ]
-        return cmd, ruta_salida, "video"
-
-    elif tipo == "audio":
-        ruta_salida = str(
-            Path(dirs["directorio_base"]) / dirs["audio"] / f"{nombre_salida}.mp3"
-        )
-        cmd = [
-            "yt-dlp",
-            "--no-warnings",
-            "--extract-audio",
-            "--audio-format",
-            video_config.get("formato_audio", "mp3"),
-            "--audio-quality",
-            str(video_config.get("calidad_audio", "0")),
-            "--output",
-            str(
-                Path(dirs["directorio_base"])
-                / dirs["audio"]
-                / f"{nombre_salida}.%(ext)s"
-            ),
-            url,
-        ]
-        return cmd, ruta_salida, "audio"
-
-    elif tipo == "transcript":
-        ruta_base = str(
-            Path(dirs["directorio_base"]) / dirs["transcripcion"] / nombre_salida
-        )
-        cmd = [
-            "yt-dlp",
-            "--no-warnings",
-            "--write-subs",
-            "--write-auto-subs",
-            "--sub-langs",
-            transcript_config.get("idiomas", "all"),
-            "--skip-download",
-            "--output",
-            ruta_base,
-            url,
-        ]
-        return cmd, ruta_base, "transcript"
-
-    elif tipo == "all":
-        ruta_video = str(
-            Path(dirs["directorio_base"]) / dirs["video"] / f"{nombre_salida}.mp4"
-        )
-        cmd = [
-            "yt-dlp",
-            "--no-warnings",
-            "--format",
-            f"best[ext={video_config.get('formato_preferido', 'mp4')}]/best",
-            "--write-subs",
-            "--write-auto-subs",
-            "--sub-langs",
-            transcript_config.get("idiomas", "all"),
-            "--output",
-            ruta_video,
-            url,
-        ]
-        return cmd, ruta_video, "all"
+    constructor = despacho.get(tipo)
+    if constructor is None:
+        return None, None, None
 
-    return None, None, None
+    return constructor(url, nombre_salida)
 
 
 def ejecutar_descarga(
@@ -165,14 +241,26 @@ def ejecutar_descarga(
     Returns:
         True si la descarga fue exitosa
     """
+    global _DEPENDENCIAS_LISTAS
+
     es_valida, video_id = validar_url_zoom(url)
     if not es_valida:
-        logger.error(f"URL invalida: {url}")
+        logger.error("URL invalida: %s", url)
         return False
 
-    if not instalar_dependencias(logger):
-        logger.error("No se pudo instalar yt-dlp")
-        return False
+    # Sin una extension conocida no se podria localizar ni mover el audio
+    if tipo in ("audio", "all"):
+        try:
+            extension = extension_audio(config)
+        except ValueError as e:
+            logger.error("%s", e)
+            return False
+
+    if not _DEPENDENCIAS_LISTAS:
+        if not instalar_dependencias(logger):
+            logger.error("No se pudo instalar yt-dlp")
+            return False
+        _DEPENDENCIAS_LISTAS = True
 
     if nombre:
         nombre_archivo = sanitizar_nombre_archivo(nombre)
@@ -180,7 +268,7 @@ def ejecutar_descarga(
         nombre_base = video_id[:20] if video_id else "video_descarga"
         nombre_archivo = sanitizar_nombre_archivo(nombre_base)
 
-    logger.info(f"Iniciando descarga: {nombre_archivo} (tipo: {tipo})")
+    logger.info("Iniciando descarga: %s (tipo: %s)", nombre_archivo, tipo)
 
     crear_directorios(config)
 
@@ -189,18 +277,31 @@ def ejecutar_descarga(
     )
 
     if not cmd:
-        logger.error(f"Tipo de descarga no valido: {tipo}")
+        logger.error("Tipo de descarga no valido: %s", tipo)
         return False
 
     reintentos = config.get("reintentos", {}).get("maximos", 3)
 
+    # yt-dlp informa del progreso a medida que descarga (en el propio proceso
+    # o linea a linea con --newline); en una terminal se muestra en la barra
+    barra = None
+    progreso = None
+    if sys.stdout is not None and sys.stdout.isatty():
+        barra = BarraProgreso(100, prefix="Descargando", intervalo_minimo=0.2)
+
+        def progreso(porcentaje: float) -> None:
+            barra.actualizar(min(int(porcentaje), 100), nombre_archivo)
+
     exito, resultado = reintentar_con_backoff(
-        func=lambda: subprocess.run(cmd, capture_output=True, text=True),
+        func=lambda: ejecutar_yt_dlp(cmd, progreso),
         max_reintentos=reintentos,
         intervalo_base=config.get("reintentos", {}).get("intervalo_segundos", 5),
         logger=logger,
     )
 
+    if barra is not None:
+        barra.finalizar()
+
     if not exito:
         logger.error("Descarga fallida despues de todos los reintentos")
         return False
@@ -208,42 +309,46 @@ def ejecutar_descarga(
     resultado_final = resultado
 
     if resultado_final.returncode != 0:
-        logger.error(f"yt-dlp error: {resultado_final.stderr}")
+        logger.error("yt-dlp error: %s", resultado_final.stderr)
         return False
 
-    logger.info(f"Descarga completada: {nombre_archivo}")
+    logger.info("Descarga completada: %s", nombre_archivo)
 
     rutas_archivos = {}
+    dirs = config["descargas"]
 
     if tipo_archivos in ["video", "all"]:
         if tipo == "all":
-            video_file = str(
-                Path(config["descargas"]["directorio_base"])
-                / config["descargas"]["video"]
-                / f"{nombre_archivo}.mp4"
-            )
-            audio_file = str(
-                Path(config["descargas"]["directorio_base"])
-                / config["descargas"]["audio"]
-                / f"{nombre_archivo}.mp3"
+            # yt-dlp deja el audio extraido junto al video (ruta_salida ya es
+            # la ruta exacta del MP4); se mueve a la carpeta de audio
+            audio_extraido = os.path.splitext(ruta_salida)[0] + extension
+            audio_file = os.path.join(
+                dirs["directorio_base"], dirs["audio"], nombre_archivo + extension
             )
 
-            if Path(video_file).exists():
-                convertir_a_mp3(video_file, audio_file, logger, config)
+            if os.path.exists(audio_extraido):
+                shutil.move(audio_extraido, audio_file)
                 rutas_archivos["audio"] = audio_file
 
         rutas_archivos["video"] = ruta_salida
 
     if tipo_archivos in ["transcript", "all"]:
-        import glob
-
-        archivos_vtt = glob.glob(
-            str(
-                Path(config["descargas"]["directorio_base"])
-                / config["descargas"]["transcripcion"]
-                / f"{nombre_archivo}*.vtt"
-            )
+        dir_transcripcion = os.path.join(
+            dirs["directorio_base"], dirs["transcripcion"]
         )
+        try:
+            with os.scandir(dir_transcripcion) as entradas:
+                # El prefijo termina en punto para que "clase_1" no recoja
+                # los subtitulos de "clase_10"
+                prefijo = f"{nombre_archivo}."
+                archivos_vtt = [
+                    entrada.path
+                    for entrada in entradas
+                    if entrada.name.startswith(prefijo)
+                    and entrada.name.endswith(".vtt")
+                ]
+        except FileNotFoundError:
+            archivos_vtt = []
 
         convertir_srt = "srt" in config.get("transcripcion", {}).get(
             "formatos_salida", []
@@ -277,10 +382,11 @@ def mostrar_resumen_descarga(
     imprimir_texto(f"{'=' * 50}\n", Colores.VERDE)
 
     for tipo_archivo, ruta in rutas.items():
-        tamano = formatear_tamano(
-            Path(ruta).stat().st_size if Path(ruta).exists() else 0
-        )
-        logger.info(f"  {tipo_archivo}: {ruta} ({tamano})")
+        try:
+            tamano = formatear_tamano(os.stat(ruta).st_size)
+        except OSError:
+            tamano = _TAMANO_CERO
+        logger.info("  %s: %s (%s)", tipo_archivo, ruta, tamano)
         print(f"  [{tipo_archivo.upper()}]: {ruta}")
         print(f"    Tamano: {tamano}")
 
@@ -344,8 +450,9 @@ def menu_interactivo() -> tuple:
     if not url:
         return "", "", ""
 
-    if not url.startswith("https://zoom.us/rec/"):
-        print("Error: La URL debe ser de Zoom (https://zoom.us/rec/...)")
+    # Misma expresion precompilada que usa ejecutar_descarga
+    if not validar_url_zoom(url)[0]:
+        print("Error: La URL debe ser de Zoom (https://zoom.us/rec/play/...)")
         return "", "", ""
 
     print("\nTipo de descarga:")
@@ -367,21 +474,54 @@ def menu_interactivo() -> tuple:
     return url, tipo, nombre
 
 
-def main() -> None:
-    """
-    Funcion principal del descargador individual.
+def descargar(
+    url: str,
+    tipo: str = "all",
+    nombre: Optional[str] = None,
+    ruta_config: str = "config.yaml",
+    verbose: bool = False,
+) -> bool:
     """
-    args = obtener_argumentos()
+    Descargar una grabacion dentro del proceso actual.
+
+    Permite que la interfaz interactiva descargue sin lanzar un interprete
+    nuevo por cada URL.
+
+    Args:
+        url: URL de la grabacion de Zoom
+        tipo: Tipo de descarga (video, audio, transcript, all)
+        nombre: Nombre personalizado (opcional)
+        ruta_config: Archivo de configuracion
+        verbose: Modo verboso (debug)
 
-    config = cargar_configuracion(args.config)
+    Returns:
+        True si la descarga fue exitosa
+    """
+    config = cargar_configuracion(ruta_config)
 
-    if args.verbose:
+    if verbose:
         config["logging"]["nivel"] = "DEBUG"
 
     logger = inicializar_logging(config)
 
     logger.info("Iniciando Zoom Video Downloader - Descarga Individual")
 
+    exito = ejecutar_descarga(url, tipo, nombre, config, logger)
+
+    if exito:
+        logger.info("Descarga completada exitosamente")
+    else:
+        logger.error("Descarga fallida")
+
+    return exito
+
+
+def main() -> None:
+    """
+    Funcion principal del descargador individual.
+    """
+    args = obtener_argumentos()
+
     if args.url:
         url, tipo, nombre = args.url, args.tipo, args.nombre
     else:
@@ -390,14 +530,8 @@ def main() -> None:
             print("URL requerida")
             sys.exit(1)
 
-    exito = ejecutar_descarga(url, tipo, nombre, config, logger)
-
-    if exito:
-        logger.info("Descarga completada exitosamente")
-        sys.exit(0)
-    else:
-        logger.error("Descarga fallida")
-        sys.exit(1)
+    exito = descargar(url, tipo, nombre, args.config, args.verbose)
+    sys.exit(0 if exito else 1)
 
 
 if __name__ == "__main__":
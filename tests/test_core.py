@@ -63,6 +63,45 @@ class TestConfiguracion:
         assert dirs["audio"].exists()
         assert dirs["transcripcion"].exists()
 
+    def test_directorios_creados_una_vez(self, tmp_path, monkeypatch):
+        """Las carpetas ya creadas no se vuelven a crear en cada descarga."""
+        from unittest.mock import patch
+        from core import crear_directorios, cargar_configuracion
+
+        monkeypatch.chdir(tmp_path)
+        config = cargar_configuracion("archivo_inexistente.yaml")
+        dirs = crear_directorios(config)
+        assert dirs["transcripcion"].is_dir()
+
+        with patch.object(Path, "mkdir") as mkdir:
+            assert crear_directorios(config) == dirs
+        mkdir.assert_not_called()
+
+        # Una carpeta borrada entre descargas se vuelve a crear
+        dirs["video"].rmdir()
+        crear_directorios(config)
+        assert dirs["video"].is_dir()
+
+    def test_configuracion_en_cache_por_mtime(self, tmp_path):
+        """El YAML se analiza una vez por version y cada llamada recibe una copia."""
+        import yaml
+
+        ruta = tmp_path / "config.yaml"
+        ruta.write_text("logging:\n  nivel: INFO\n", encoding="utf-8")
+
+        with patch("core.yaml.load", wraps=yaml.load) as analizar:
+            primera = cargar_configuracion(str(ruta))
+            primera["logging"]["nivel"] = "DEBUG"
+            segunda = cargar_configuracion(str(ruta))
+
+            assert analizar.call_count == 1
+            assert segunda["logging"]["nivel"] == "INFO"
+
+            ruta.write_text("logging:\n  nivel: ERROR\n", encoding="utf-8")
+            os.utime(ruta, ns=(0, os.stat(ruta).st_mtime_ns + 1))
+            assert cargar_configuracion(str(ruta))["logging"]["nivel"] == "ERROR"
+            assert analizar.call_count == 2
+
 
 class TestSanitizacion:
     """Pruebas para la sanitizacion de nombres de archivo."""
@@ -122,6 +161,17 @@ class TestValidacion:
 
         assert es_valida is False
 
+    def test_menu_individual_rechaza_url_invalida(self):
+        """El menu del descargador individual valida con validar_url_zoom."""
+        import simple_zoom_downloader as sd
+
+        with patch("builtins.input", side_effect=["https://zoom.us/rec/"]):
+            assert sd.menu_interactivo() == ("", "", "")
+
+        entradas = ["https://zoom.us/rec/play/abc123", "2", "clase"]
+        with patch("builtins.input", side_effect=entradas):
+            assert sd.menu_interactivo() == (entradas[0], "audio", "clase")
+
     def test_extraer_id_video(self):
         """Extraer ID de video de URL."""
         url = "https://zoom.us/rec/play/abc123...xyz789"
@@ -160,6 +210,29 @@ class TestFormateo:
         resultado = formatear_tamano(1073741824)
         assert resultado == "1.0 GB"
 
+    def test_barra_progreso_limita_redibujos(self, capsys):
+        """Las actualizaciones seguidas se agrupan; la ultima siempre se dibuja."""
+        from core import BarraProgreso
+
+        barra = BarraProgreso(100, prefix="Descargando", intervalo_minimo=60)
+        for i in range(1, 101):
+            barra.actualizar(i, f"clase_{i}")
+
+        salida = capsys.readouterr().out
+        assert salida.count("\r") == 2
+        assert "(100/100)" in salida
+
+    def test_barra_progreso_no_repite_lineas(self, capsys):
+        """Una linea identica a la anterior no se vuelve a escribir."""
+        from core import BarraProgreso
+
+        barra = BarraProgreso(10, prefix="Descargando", intervalo_minimo=0)
+        with patch("core.time.time", return_value=barra.inicio):
+            barra.actualizar(5, "clase")
+            barra.actualizar(5, "clase")
+
+        assert capsys.readouterr().out.count("\r") == 1
+
 
 class TestConversion:
     """Pruebas para conversion de formatos."""
@@ -203,6 +276,274 @@ Adios mundo
             if ruta_srt is not None and Path(ruta_srt).exists():
                 os.unlink(ruta_srt)
 
+    def test_convertir_vtt_conserva_texto_utf8(self, tmp_path):
+        """Solo cambian cabecera y marcas de tiempo; el texto UTF-8 queda intacto."""
+        ruta_vtt = tmp_path / "clase.es.vtt"
+        texto = "\u00bfQue tal, Jos\u00e9?\n".encode()
+        ruta_vtt.write_bytes(b"WEBVTT\n\n00:00:01.500 --> 00:00:02.250\n" + texto)
+
+        ruta_srt = convertir_vtt_a_srt(str(ruta_vtt), MagicMock())
+
+        contenido = Path(ruta_srt).read_bytes()
+        assert b"WEBVTT" not in contenido
+        assert b"00:00:01,500" in contenido
+        assert b"00:00:02,250" in contenido
+        assert contenido.endswith(texto)
+
+
+class TestDescargaMasiva:
+    """Pruebas para la ejecucion de descargas en batch_downloader."""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.config = cargar_configuracion("archivo_inexistente.yaml")
+        self.config["descargas"]["directorio_base"] = self.temp_dir
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_argumentos_con_parser_reutilizado(self):
+        """El parser se construye una vez y cada llamada parsea su propio argv."""
+        import batch_downloader
+
+        primero = batch_downloader.obtener_argumentos(["a.txt", "video", "--jobs", "2"])
+        segundo = batch_downloader.obtener_argumentos(["b.csv"])
+
+        assert (primero.archivo, primero.tipo, primero.jobs) == ("a.txt", "video", 2)
+        assert (segundo.archivo, segundo.tipo, segundo.jobs) == ("b.csv", "all", None)
+        assert batch_downloader._crear_parser.cache_info().currsize == 1
+
+    def test_omite_archivo_existente(self):
+        """Si el archivo final ya existe no se invoca yt-dlp."""
+        import batch_downloader
+
+        carpeta = Path(self.temp_dir) / "MP4"
+        carpeta.mkdir(parents=True)
+        (carpeta / "clase.mp4").write_bytes(b"video")
+
+        with patch.object(
+            batch_downloader, "instalar_dependencias", return_value=True
+        ), patch.object(batch_downloader, "ejecutar_yt_dlp") as yt_dlp:
+            exito = batch_downloader.ejecutar_descarga(
+                "https://zoom.us/rec/play/abc123",
+                "video",
+                "clase",
+                self.config,
+                MagicMock(),
+            )
+
+        assert exito is True
+        yt_dlp.assert_not_called()
+
+    def test_listado_unico_de_existentes(self):
+        """Con el listado previo no se consulta el disco por cada URL."""
+        import batch_downloader
+        from core import crear_directorios
+
+        directorios = crear_directorios(self.config)
+        (directorios["audio"] / "clase.mp3").write_bytes(b"audio")
+        existentes = batch_downloader.listar_archivos_existentes(directorios)
+
+        assert str(directorios["audio"] / "clase.mp3") in existentes
+
+        with patch.object(
+            batch_downloader, "instalar_dependencias", return_value=True
+        ), patch.object(batch_downloader, "ejecutar_yt_dlp") as yt_dlp, patch(
+            "batch_downloader.Path.exists"
+        ) as existe:
+            exito = batch_downloader.ejecutar_descarga(
+                "https://zoom.us/rec/play/abc123",
+                "audio",
+                "clase",
+                self.config,
+                MagicMock(),
+                existentes,
+            )
+
+        assert exito is True
+        yt_dlp.assert_not_called()
+        existe.assert_not_called()
+
+    def test_existentes_con_base_sin_normalizar(self, monkeypatch):
+        """Una base como "./downloads/" no impide reconocer lo ya descargado."""
+        import batch_downloader
+        from core import crear_directorios
+
+        monkeypatch.chdir(self.temp_dir)
+        self.config["descargas"]["directorio_base"] = "./downloads/"
+        directorios = crear_directorios(self.config)
+        (directorios["audio"] / "clase.mp3").write_bytes(b"audio")
+        existentes = batch_downloader.listar_archivos_existentes(directorios)
+
+        with patch.object(
+            batch_downloader, "instalar_dependencias", return_value=True
+        ), patch.object(batch_downloader, "ejecutar_yt_dlp") as yt_dlp:
+            exito = batch_downloader.ejecutar_descarga(
+                "https://zoom.us/rec/play/abc123",
+                "audio",
+                "clase",
+                self.config,
+                MagicMock(),
+                existentes,
+            )
+
+        assert exito is True
+        yt_dlp.assert_not_called()
+
+    def test_http_429_se_reintenta(self):
+        """Un HTTP 429 provoca una espera y un nuevo intento."""
+        import subprocess
+        import batch_downloader
+
+        cmd = ["yt-dlp", "https://zoom.us/rec/play/abc123"]
+        limitado = subprocess.CompletedProcess(
+            cmd, 1, stderr="ERROR: HTTP Error 429: Too Many Requests"
+        )
+        correcto = subprocess.CompletedProcess(cmd, 0, stderr="")
+        self.config["descarga"]["limite_velocidad"] = "5M"
+
+        with patch.object(
+            batch_downloader, "instalar_dependencias", return_value=True
+        ), patch.object(
+            batch_downloader, "ejecutar_yt_dlp", side_effect=[limitado, correcto]
+        ) as yt_dlp, patch("core.time.sleep"), patch.object(
+            batch_downloader, "guardar_metadatos"
+        ):
+            exito = batch_downloader.ejecutar_descarga(
+                "https://zoom.us/rec/play/abc123",
+                "video",
+                "clase",
+                self.config,
+                MagicMock(),
+            )
+
+        assert exito is True
+        assert yt_dlp.call_count == 2
+        cmd = yt_dlp.call_args[0][0]
+        assert cmd[cmd.index("--limit-rate") + 1] == "5M"
+
+    def test_transcripciones_por_prefijo_exacto(self):
+        """Solo se convierten los VTT de la grabacion descargada."""
+        import batch_downloader
+        from core import crear_directorios
+
+        directorios = crear_directorios(self.config)
+        for nombre in ("clase_1.es.vtt", "clase_10.es.vtt", "clase_1.es.srt"):
+            (directorios["transcripcion"] / nombre).write_text("WEBVTT\n")
+
+        with patch.object(
+            batch_downloader, "convertir_vtt_a_srt"
+        ) as convertir, patch.object(batch_downloader, "guardar_metadatos"):
+            batch_downloader.procesar_archivos_descargados(
+                "https://zoom.us/rec/play/abc123",
+                "transcript",
+                "clase_1",
+                str(directorios["transcripcion"] / "clase_1"),
+                "transcript",
+                self.config,
+                MagicMock(),
+            )
+
+        convertidos = [Path(c.args[0]).name for c in convertir.call_args_list]
+        assert convertidos == ["clase_1.es.vtt"]
+
+    def test_completar_en_paralelo_acotado(self):
+        """Nunca hay mas de max_pendientes tareas enviadas sin recoger."""
+        from concurrent.futures import Future
+        from core import completar_en_paralelo
+
+        enviadas = []
+
+        def enviar(tarea):
+            enviadas.append(tarea)
+            futuro = Future()
+            futuro.set_result(tarea * 2)
+            return futuro
+
+        recogidas = []
+        for tarea, futuro in completar_en_paralelo(range(10), enviar, 3):
+            assert len(enviadas) - len(recogidas) <= 3
+            recogidas.append(futuro.result())
+
+        assert sorted(recogidas) == [i * 2 for i in range(10)]
+
+    def test_recoger_resultados_cuenta_fallos(self):
+        """Los errores inesperados cuentan como fallos de todo el grupo."""
+        from concurrent.futures import Future
+        from batch_downloader import recoger_resultados
+
+        def enviar(grupo):
+            futuro = Future()
+            if grupo[0][0] == "roto":
+                futuro.set_exception(RuntimeError("fallo"))
+            else:
+                futuro.set_result(True)
+            return futuro
+
+        grupos = [[("bien", "u1")], [("roto", "u2")]]
+        completadas, exitosas, fallidas = recoger_resultados(
+            grupos, enviar, 2, MagicMock(), MagicMock()
+        )
+
+        assert (completadas, exitosas) == (2, 1)
+        assert fallidas == [("roto", "u2")]
+
+    def test_registro_sqlite_de_descargas(self):
+        """El registro solo omite descargas cuyo archivo sigue existiendo."""
+        from batch_downloader import RegistroDescargas
+
+        video = Path(self.temp_dir) / "clase.mp4"
+        video.write_bytes(b"video")
+        url = "https://zoom.us/rec/play/abc123"
+
+        registro = RegistroDescargas(str(Path(self.temp_dir) / "descargas.sqlite"))
+        assert not registro.completada(url, "video")
+
+        registro.marcar(url, "video", str(video))
+        registro.marcar(url, "transcript", None)
+        assert registro.completada(url, "video")
+        assert registro.completada(url, "transcript")
+        assert not registro.completada(url, "audio")
+
+        video.unlink()
+        assert not registro.completada(url, "video")
+        registro.cerrar()
+
+    def test_lote_una_ejecucion_y_renombrado(self):
+        """Un lote usa un solo comando y renombra los archivos por ID."""
+        import subprocess
+        import batch_downloader
+
+        carpeta = Path(self.temp_dir) / "MP4"
+
+        def falsa_descarga(cmd, progreso=None):
+            assert cmd[-2] == "--batch-file"
+            assert Path(cmd[-1]).read_text().split() == [
+                "https://zoom.us/rec/play/abc123",
+                "https://zoom.us/rec/play/def456",
+            ]
+            assert str(carpeta / "%(id)s.mp4") in cmd
+            (carpeta / "abc123.mp4").write_bytes(b"video")
+            return subprocess.CompletedProcess(cmd, 1, stderr="def456: error")
+
+        with patch.object(
+            batch_downloader, "ejecutar_yt_dlp", side_effect=falsa_descarga
+        ) as yt_dlp, patch.object(batch_downloader, "guardar_metadatos"):
+            resultados = batch_downloader.ejecutar_descarga_lote(
+                [
+                    ("Clase 1", "https://zoom.us/rec/play/abc123"),
+                    ("Clase 2", "https://zoom.us/rec/play/def456"),
+                ],
+                "video",
+                self.config,
+                MagicMock(),
+            )
+
+        assert yt_dlp.call_count == 1
+        assert resultados == [True, False]
+        assert (carpeta / "Clase 1.mp4").exists()
+        assert not (carpeta / "abc123.mp4").exists()
+
 
 class TestLecturaArchivos:
     """Pruebas para lectura de archivos."""
@@ -247,6 +588,124 @@ Clase 2,https://zoom.us/rec/play/def456
         finally:
             os.unlink(ruta)
 
+    def test_leer_csv_con_comentarios(self):
+        """Detectar CSV aunque el archivo empiece con comentarios."""
+        contenido = """# Formato: titulo,URL
+# Una linea de comentario sin comas
+
+Clase 1,https://zoom.us/rec/play/abc123
+"""
+
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as f:
+            f.write(contenido)
+            ruta = f.name
+
+        try:
+            mock_logger = MagicMock()
+            urls = leer_urls_desde_archivo(ruta, mock_logger)
+
+            assert urls == [("Clase 1", "https://zoom.us/rec/play/abc123")]
+        finally:
+            os.unlink(ruta)
+
+    def test_leer_csv_titulo_utf8_y_ruido_binario(self):
+        """El titulo se decodifica como UTF-8 y las lineas no validas se ignoran."""
+        contenido = (
+            "F\u00edsica,https://zoom.us/rec/play/abc123\n".encode("utf-8")
+            + b"\xff\xfe basura sin url\n"
+        )
+
+        with tempfile.NamedTemporaryFile(mode="wb", suffix=".csv", delete=False) as f:
+            f.write(contenido)
+            ruta = f.name
+
+        try:
+            urls = leer_urls_desde_archivo(ruta, MagicMock())
+
+            nombre = sanitizar_nombre_archivo("F\u00edsica")
+            assert urls == [(nombre, "https://zoom.us/rec/play/abc123")]
+        finally:
+            os.unlink(ruta)
+
+    def test_leer_txt_sin_duplicados(self):
+        """Una misma grabacion listada dos veces se descarga una sola vez."""
+        contenido = """https://zoom.us/rec/play/abc123
+https://zoom.us/rec/play/def456
+https://zoom.us/rec/play/abc123?pwd=xyz
+"""
+
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as f:
+            f.write(contenido)
+            ruta = f.name
+
+        try:
+            urls = leer_urls_desde_archivo(ruta, MagicMock())
+
+            assert urls == [
+                ("video_1", "https://zoom.us/rec/play/abc123"),
+                ("video_2", "https://zoom.us/rec/play/def456"),
+            ]
+        finally:
+            os.unlink(ruta)
+
+    def test_leer_csv_rechaza_urls_sin_grabacion(self):
+        """Solo se aceptan URLs /rec/play/ validas; la URL puede llevar comas."""
+        contenido = """Clase 1, https://zoom.us/rec/play/abc123?pwd=a,b
+Compartida,https://zoom.us/rec/share/def456
+Sin id,https://zoom.us/rec/play/
+Con espacio,https://zoom.us/rec/play/ghi 789
+"""
+
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as f:
+            f.write(contenido)
+            ruta = f.name
+
+        try:
+            urls = leer_urls_desde_archivo(ruta, MagicMock())
+
+            assert urls == [("Clase 1", "https://zoom.us/rec/play/abc123?pwd=a,b")]
+        finally:
+            os.unlink(ruta)
+
+    def test_leer_archivo_mezclado(self):
+        """Cada linea se interpreta como CSV o como URL sola."""
+        contenido = """https://zoom.us/rec/play/abc123
+Clase 2,https://zoom.us/rec/play/def456
+"""
+
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as f:
+            f.write(contenido)
+            ruta = f.name
+
+        try:
+            urls = leer_urls_desde_archivo(ruta, MagicMock())
+
+            assert urls == [
+                ("video_1", "https://zoom.us/rec/play/abc123"),
+                ("Clase 2", "https://zoom.us/rec/play/def456"),
+            ]
+        finally:
+            os.unlink(ruta)
+
+    def test_iterar_urls_es_perezoso(self):
+        """Las URLs se entregan sin leer el archivo completo."""
+        from core import iterar_urls_desde_archivo
+
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as f:
+            f.write("https://zoom.us/rec/play/abc123\n")
+            f.write("https://zoom.us/rec/play/def456\n")
+            ruta = f.name
+
+        try:
+            logger = MagicMock()
+            iterador = iterar_urls_desde_archivo(ruta, logger)
+
+            assert next(iterador) == ("video_1", "https://zoom.us/rec/play/abc123")
+            logger.info.assert_not_called()
+            assert list(iterador) == [("video_2", "https://zoom.us/rec/play/def456")]
+        finally:
+            os.unlink(ruta)
+
     def test_leer_archivo_vacio(self):
         """Manejar archivo vacio."""
         with tempfile.NamedTemporaryFile(mode="w", suffix=".txt", delete=False) as f:
@@ -269,6 +728,495 @@ Clase 2,https://zoom.us/rec/play/def456
         assert len(urls) == 0
 
 
+class TestMetadatos:
+    """Pruebas para el registro de metadatos de descargas."""
+
+    def test_metadatos_se_anaden_por_linea(self, tmp_path, monkeypatch):
+        """Cada descarga anade una linea JSON sin reescribir las anteriores."""
+        from core import guardar_metadatos, leer_metadatos
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "downloads").mkdir()
+        video = tmp_path / "clase.mp4"
+        video.write_bytes(b"x" * 2048)
+
+        guardar_metadatos("clase_1", "u1", "video", {"video": str(video)}, MagicMock())
+        guardar_metadatos("clase_2", "u2", "audio", {}, MagicMock())
+        with open("downloads/metadatos.jsonl", "a", encoding="utf-8") as f:
+            f.write('{"nombre": "cort')
+
+        entradas = list(leer_metadatos())
+        assert [e["nombre"] for e in entradas] == ["clase_1", "clase_2"]
+        assert entradas[0]["archivos"]["video"]["tamano_formateado"] == "2.0 KB"
+        assert entradas[0]["archivos"]["video"]["fecha_modificacion"]
+
+
+class TestReintentos:
+    """Pruebas para los reintentos con backoff exponencial."""
+
+    def test_espera_con_tope_y_variacion(self):
+        """La espera crece, se limita a max_espera y aplica la variacion."""
+        from core import reintentar_con_backoff
+
+        func = MagicMock(side_effect=[OSError("red")] * 3 + [1])
+        with patch("core.time.sleep") as dormir, patch(
+            "core.random.uniform", return_value=0.5
+        ):
+            exito, resultado = reintentar_con_backoff(
+                func, max_reintentos=4, intervalo_base=10, max_espera=15, variacion=0.5
+            )
+
+        assert (exito, resultado) == (True, 1)
+        assert [c.args[0] for c in dormir.call_args_list] == [15.0, 15.0, 15.0]
+
+        func = MagicMock(side_effect=[OSError("red")] * 3 + [1])
+        with patch("core.time.sleep") as dormir, patch(
+            "core.random.uniform", return_value=-0.5
+        ):
+            reintentar_con_backoff(
+                func, max_reintentos=4, intervalo_base=10, max_espera=15, variacion=0.5
+            )
+
+        assert [c.args[0] for c in dormir.call_args_list] == [5.0, 10.0, 15.0]
+
+    def test_espera_nunca_supera_el_tope(self):
+        """Con cualquier variacion la espera no pasa de max_espera."""
+        from core import reintentar_con_backoff
+
+        func = MagicMock(side_effect=OSError("red"))
+        with patch("core.time.sleep") as dormir:
+            for _ in range(50):
+                reintentar_con_backoff(
+                    func,
+                    max_reintentos=5,
+                    intervalo_base=5,
+                    max_espera=30,
+                    variacion=0.5,
+                )
+
+        assert max(c.args[0] for c in dormir.call_args_list) <= 30
+
+
+class TestRegistro:
+    """Pruebas para el registro en cola de los hilos de descarga."""
+
+    def test_registro_en_cola_descarta_antiguos(self):
+        """Con la cola llena se conservan los mensajes mas recientes."""
+        import logging
+        from core import iniciar_registro_en_cola, detener_registro_en_cola
+
+        recibidos = []
+
+        class Captura(logging.Handler):
+            def emit(self, record):
+                recibidos.append(record.getMessage())
+
+        logger = logging.getLogger("zoom_downloader_prueba_cola")
+        logger.setLevel(logging.INFO)
+        captura = Captura()
+        logger.addHandler(captura)
+
+        try:
+            oyente = iniciar_registro_en_cola(logger, capacidad=2)
+            oyente.stop()
+            for i in range(5):
+                logger.info(f"mensaje {i}")
+            oyente.start()
+            detener_registro_en_cola(logger, oyente)
+
+            assert recibidos == ["mensaje 3", "mensaje 4"]
+            assert logger.handlers == [captura]
+        finally:
+            logger.removeHandler(captura)
+
+    def test_masiva_interrumpida_restaura_manejadores(self, tmp_path, monkeypatch):
+        """Una interrupcion durante la descarga masiva no deja el logger en cola."""
+        import batch_downloader
+        from core import _ManejadorColaAcotada
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "urls.txt").write_text("https://zoom.us/rec/play/abc123\n")
+        monkeypatch.setattr(batch_downloader, "instalar_dependencias", lambda _: True)
+        monkeypatch.setattr(
+            batch_downloader,
+            "recoger_resultados",
+            MagicMock(side_effect=KeyboardInterrupt),
+        )
+
+        with pytest.raises(KeyboardInterrupt):
+            batch_downloader.main(
+                ["urls.txt", "transcript", "--no-confirm", "--config", "no.yaml"]
+            )
+
+        logger = batch_downloader.inicializar_logging(
+            cargar_configuracion("no.yaml")
+        )
+        assert logger.handlers
+        assert not any(
+            isinstance(manejador, _ManejadorColaAcotada)
+            for manejador in logger.handlers
+        )
+
+    def test_masiva_interrumpida_cierra_registro(self, tmp_path, monkeypatch):
+        """Una interrupcion en el pool no deja abierta la conexion SQLite."""
+        import batch_downloader
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "urls.txt").write_text("https://zoom.us/rec/play/abc123\n")
+        monkeypatch.setattr(batch_downloader, "instalar_dependencias", lambda _: True)
+        monkeypatch.setattr(
+            batch_downloader,
+            "recoger_resultados",
+            MagicMock(side_effect=KeyboardInterrupt),
+        )
+        cerrar = MagicMock(wraps=batch_downloader.RegistroDescargas.cerrar)
+        monkeypatch.setattr(
+            batch_downloader.RegistroDescargas,
+            "cerrar",
+            lambda registro: cerrar(registro),
+        )
+
+        with pytest.raises(KeyboardInterrupt):
+            batch_downloader.main(
+                ["urls.txt", "transcript", "--no-confirm", "--config", "no.yaml"]
+            )
+
+        cerrar.assert_called_once()
+
+    def test_inicializar_logging_sin_duplicar(self, tmp_path):
+        """Inicializar dos veces no anade manejadores y actualiza el nivel."""
+        import logging
+        from core import inicializar_logging
+
+        config = cargar_configuracion("archivo_inexistente.yaml")
+        config["logging"]["archivo"] = str(tmp_path / "descargas.log")
+
+        logger = logging.getLogger("zoom_downloader")
+        previos = list(logger.handlers)
+        for manejador in previos:
+            logger.removeHandler(manejador)
+
+        try:
+            inicializar_logging(config)
+            config["logging"]["nivel"] = "DEBUG"
+            logger = inicializar_logging(config)
+
+            assert len(logger.handlers) == 2
+            assert logger.propagate is False
+            assert all(m.level == logging.DEBUG for m in logger.handlers)
+        finally:
+            for manejador in list(logger.handlers):
+                logger.removeHandler(manejador)
+                manejador.close()
+            for manejador in previos:
+                logger.addHandler(manejador)
+
+    def test_log_inmediato_y_carpeta_creada(self, tmp_path):
+        """Cada registro llega al archivo al momento, no solo los errores."""
+        import logging
+        from core import inicializar_logging
+
+        archivo = tmp_path / "log" / "descargas.log"
+        config = cargar_configuracion("archivo_inexistente.yaml")
+        config["logging"]["archivo"] = str(archivo)
+
+        logger = logging.getLogger("zoom_downloader")
+        previos = list(logger.handlers)
+        for manejador in previos:
+            logger.removeHandler(manejador)
+
+        try:
+            logger = inicializar_logging(config)
+            assert not archivo.exists()
+
+            logger.info("primer mensaje")
+            assert "primer mensaje" in archivo.read_text(encoding="utf-8")
+
+            logger.warning("aviso")
+            assert archivo.read_text(encoding="utf-8").count("\n") == 2
+        finally:
+            for manejador in list(logger.handlers):
+                logger.removeHandler(manejador)
+                manejador.close()
+            for manejador in previos:
+                logger.addHandler(manejador)
+
+
+class TestDependencias:
+    """Pruebas para la deteccion de herramientas externas."""
+
+    def test_herramienta_disponible_memoriza(self):
+        """La busqueda en el PATH se hace una sola vez por herramienta."""
+        from core import herramienta_disponible
+
+        herramienta_disponible.cache_clear()
+        try:
+            with patch("core.shutil.which", return_value="/usr/bin/ffmpeg") as which:
+                assert herramienta_disponible("ffmpeg") is True
+                assert herramienta_disponible("ffmpeg") is True
+                assert which.call_count == 1
+        finally:
+            herramienta_disponible.cache_clear()
+
+    def test_verificar_sudo_memoriza(self):
+        """sudo solo se lanza una vez y su ausencia no es un error."""
+        from core import verificar_sudo
+
+        verificar_sudo.cache_clear()
+        try:
+            with patch("core.subprocess.run", side_effect=FileNotFoundError) as run:
+                assert verificar_sudo() is False
+                assert verificar_sudo() is False
+            assert run.call_count == 1
+        finally:
+            verificar_sudo.cache_clear()
+
+    def test_ejecutar_proceso_conserva_final_stderr(self):
+        """Solo se guardan las ultimas lineas de stderr del proceso."""
+        from core import ejecutar_proceso
+
+        codigo = (
+            "import sys\n"
+            "for i in range(100): print(i, file=sys.stderr)\n"
+            "sys.exit(3)"
+        )
+        resultado = ejecutar_proceso([sys.executable, "-c", codigo], lineas_error=5)
+
+        assert resultado.returncode == 3
+        assert resultado.stderr.split() == ["95", "96", "97", "98", "99"]
+
+    def test_ejecutar_proceso_filtra_progreso(self):
+        """Las lineas de progreso se procesan en streaming y no se guardan."""
+        from core import ejecutar_proceso, _RE_PROGRESO_YT_DLP
+
+        codigo = (
+            "for p in (10, 55.5, 100): print(f'[download]  {p}% of 1MiB')\n"
+            "print('ERROR: fallo')"
+        )
+        porcentajes = []
+
+        def filtro(linea):
+            coincidencia = _RE_PROGRESO_YT_DLP.match(linea)
+            if coincidencia:
+                porcentajes.append(float(coincidencia.group(1)))
+            return coincidencia is not None
+
+        resultado = ejecutar_proceso([sys.executable, "-c", codigo], filtro=filtro)
+
+        assert porcentajes == [10.0, 55.5, 100.0]
+        assert resultado.stderr == "ERROR: fallo\n"
+
+    def test_convertir_a_mp3_solo_audio(self):
+        """ffmpeg no decodifica el video y usa libmp3lame explicitamente."""
+        import subprocess
+        from core import convertir_a_mp3
+
+        config = cargar_configuracion("archivo_inexistente.yaml")
+        with patch("core.verificar_ffmpeg", return_value=True), patch(
+            "core.ejecutar_proceso",
+            return_value=subprocess.CompletedProcess([], 0, stderr=""),
+        ) as proceso:
+            assert convertir_a_mp3("clase.mp4", "clase.mp3", MagicMock(), config)
+
+        cmd = proceso.call_args[0][0]
+        assert "-vn" in cmd
+        assert cmd[cmd.index("-c:a") + 1] == "libmp3lame"
+        assert cmd[cmd.index("-loglevel") + 1] == "error"
+
+    def test_ejecutar_yt_dlp_en_proceso(self):
+        """Con yt_dlp importable la descarga no lanza un subproceso."""
+        yt_dlp = pytest.importorskip("yt_dlp")
+        from core import ejecutar_yt_dlp
+
+        cmd = ["yt-dlp", "-f", "best", "https://zoom.us/rec/play/abc123"]
+        with patch.object(
+            yt_dlp.YoutubeDL, "download", return_value=0
+        ) as descarga, patch("core.subprocess.Popen") as popen:
+            resultado = ejecutar_yt_dlp(cmd)
+
+        assert resultado.returncode == 0
+        popen.assert_not_called()
+        descarga.assert_called_once_with(["https://zoom.us/rec/play/abc123"])
+
+
+class TestComandoYtDlp:
+    """Pruebas para la construccion de comandos de yt-dlp."""
+
+    def test_tipo_descarga_equivale_a_texto(self):
+        """Los miembros de TipoDescarga se comparan igual que su valor."""
+        from core import TipoDescarga
+
+        assert TipoDescarga("all") is TipoDescarga.TODO
+        assert TipoDescarga.TRANSCRIPCION == "transcript"
+        assert f"{TipoDescarga.VIDEO}" == "video"
+
+    def test_comando_all_una_invocacion(self):
+        """El tipo all extrae audio y subtitulos en el mismo comando."""
+        from batch_downloader import construir_comando_yt_dlp
+
+        config = cargar_configuracion("archivo_inexistente.yaml")
+        cmd, ruta_salida, tipo_archivos = construir_comando_yt_dlp(
+            "https://zoom.us/rec/play/abc123", "all", "clase", config
+        )
+
+        assert tipo_archivos == "all"
+        assert ruta_salida == str(Path("downloads") / "MP4" / "clase.mp4")
+        assert "--extract-audio" in cmd
+        assert "--keep-video" in cmd
+        assert f"subtitle:{Path('downloads') / 'SRT' / 'clase.%(ext)s'}" in cmd
+        assert cmd[-1] == "https://zoom.us/rec/play/abc123"
+
+    def test_comando_all_sin_convertir_audio(self):
+        """Con convertir_audio desactivado no se extrae el audio."""
+        from batch_downloader import construir_comando_yt_dlp
+
+        config = cargar_configuracion("archivo_inexistente.yaml")
+        config["video"]["convertir_audio"] = False
+        cmd, _, _ = construir_comando_yt_dlp(
+            "https://zoom.us/rec/play/abc123", "all", "clase", config
+        )
+
+        assert "--extract-audio" not in cmd
+        assert "--write-subs" in cmd
+
+    def test_audio_m4a_sin_recodificar(self):
+        """La ruta del audio sigue a formato_audio (m4a copia la pista AAC)."""
+        from batch_downloader import construir_comando_yt_dlp
+
+        config = cargar_configuracion("archivo_inexistente.yaml")
+        config["video"]["formato_audio"] = "m4a"
+        cmd, ruta, _ = construir_comando_yt_dlp(
+            "https://zoom.us/rec/play/abc123", "audio", "clase", config
+        )
+
+        assert ruta.endswith("clase.m4a")
+        assert cmd[cmd.index("--audio-format") + 1] == "m4a"
+
+    def test_audio_aac_se_guarda_como_m4a(self):
+        """La extension sigue a la tabla de yt-dlp, no al nombre del formato."""
+        from batch_downloader import construir_comando_yt_dlp
+        from core import extension_audio
+
+        config = cargar_configuracion("archivo_inexistente.yaml")
+        config["video"]["formato_audio"] = "aac"
+        cmd, ruta, _ = construir_comando_yt_dlp(
+            "https://zoom.us/rec/play/abc123", "audio", "clase", config
+        )
+
+        assert ruta.endswith("clase.m4a")
+        assert cmd[cmd.index("--audio-format") + 1] == "aac"
+
+        config["video"]["formato_audio"] = "vorbis"
+        assert extension_audio(config) == ".ogg"
+        config["video"]["formato_audio"] = "best"
+        with pytest.raises(ValueError):
+            extension_audio(config)
+
+    def test_plantilla_comando_reutilizable(self):
+        """Una plantilla preparada produce el mismo comando para cada URL."""
+        from batch_downloader import construir_comando_yt_dlp
+        from batch_downloader import preparar_plantilla_comando
+
+        config = cargar_configuracion("archivo_inexistente.yaml")
+        plantilla = preparar_plantilla_comando("audio", config)
+
+        for nombre, url in [
+            ("clase_1", "https://zoom.us/rec/play/abc123"),
+            ("clase_2", "https://zoom.us/rec/play/def456"),
+        ]:
+            assert construir_comando_yt_dlp(
+                url, "audio", nombre, config, plantilla
+            ) == construir_comando_yt_dlp(url, "audio", nombre, config)
+
+    def test_despacho_individual_reutilizable(self):
+        """El despacho preparado da los mismos comandos que sin preparar."""
+        import simple_zoom_downloader as sd
+
+        config = cargar_configuracion("archivo_inexistente.yaml")
+        despacho = sd.preparar_despacho(config)
+
+        for tipo in ("video", "audio", "transcript", "all"):
+            assert sd.construir_comando_yt_dlp(
+                "https://zoom.us/rec/play/abc123", tipo, "clase", config, despacho
+            ) == sd.construir_comando_yt_dlp(
+                "https://zoom.us/rec/play/abc123", tipo, "clase", config
+            )
+        assert sd.construir_comando_yt_dlp(
+            "https://zoom.us/rec/play/abc123", "otro", "clase", config, despacho
+        ) == (None, None, None)
+
+    def test_despacho_individual_en_cache(self):
+        """Configuraciones iguales comparten el despacho ya preparado."""
+        import simple_zoom_downloader as sd
+
+        config = cargar_configuracion("archivo_inexistente.yaml")
+        despacho = sd.preparar_despacho(config)
+        otra = cargar_configuracion("archivo_inexistente.yaml")
+        assert otra is not config
+        assert sd.preparar_despacho(otra) is despacho
+
+        config = cargar_configuracion("archivo_inexistente.yaml")
+        config["descarga"]["fragmentos_paralelos"] = 8
+        assert sd.preparar_despacho(config) is not despacho
+        with pytest.raises(TypeError):
+            despacho["video"] = None
+
+    def test_audio_individual_m4a_sin_recodificar(self):
+        """La ruta del audio individual sigue a formato_audio."""
+        import simple_zoom_downloader as sd
+
+        config = cargar_configuracion("archivo_inexistente.yaml")
+        config["video"]["formato_audio"] = "m4a"
+        cmd, ruta, _ = sd.construir_comando_yt_dlp(
+            "https://zoom.us/rec/play/abc123", "audio", "clase", config
+        )
+
+        assert ruta.endswith("clase.m4a")
+        assert cmd[cmd.index("--audio-format") + 1] == "m4a"
+
+        config["video"]["formato_audio"] = "aac"
+        _, ruta, _ = sd.construir_comando_yt_dlp(
+            "https://zoom.us/rec/play/abc123", "audio", "clase", config
+        )
+        assert ruta.endswith("clase.m4a")
+
+        config["video"]["formato_audio"] = "best"
+        assert sd.ejecutar_descarga(
+            "https://zoom.us/rec/play/abc123", "audio", "clase", config, MagicMock()
+        ) is False
+
+    def test_comando_individual_fragmentos_y_bloques(self):
+        """El descargador individual pide fragmentos en paralelo y por rangos."""
+        import simple_zoom_downloader as sd
+
+        config = cargar_configuracion("archivo_inexistente.yaml")
+        config["descarga"]["fragmentos_paralelos"] = 8
+        cmd, _, _ = sd.construir_comando_yt_dlp(
+            "https://zoom.us/rec/play/abc123", "audio", "clase", config
+        )
+        assert cmd[cmd.index("--concurrent-fragments") + 1] == "8"
+        assert cmd[cmd.index("--http-chunk-size") + 1] == "10M"
+
+        config["descarga"]["bloque_http"] = None
+        cmd, _, _ = sd.construir_comando_yt_dlp(
+            "https://zoom.us/rec/play/abc123", "audio", "clase", config
+        )
+        assert "--http-chunk-size" not in cmd
+
+    def test_comando_fragmentos_paralelos(self):
+        """Los fragmentos simultaneos se toman de la configuracion."""
+        from batch_downloader import construir_comando_yt_dlp
+
+        config = cargar_configuracion("archivo_inexistente.yaml")
+        config["descarga"]["fragmentos_paralelos"] = 8
+        cmd, _, _ = construir_comando_yt_dlp(
+            "https://zoom.us/rec/play/abc123", "video", "clase", config
+        )
+
+        indice = cmd.index("--concurrent-fragments")
+        assert cmd[indice + 1] == "8"
+
+
 class TestColores:
     """Pruebas para el sistema de colores."""
 
@@ -279,6 +1227,18 @@ class TestColores:
         assert Colores.VERDE is not None
         assert Colores.AZUL is not None
 
+    def test_sin_terminal_no_hay_codigos_ansi(self, capsys):
+        """Con la salida redirigida se imprime el texto sin colores."""
+        from core import imprimir_texto
+
+        with patch("core._USAR_COLORES", False):
+            imprimir_texto("Listo", Colores.VERDE)
+        assert capsys.readouterr().out == "Listo\n"
+
+        with patch("core._USAR_COLORES", True):
+            imprimir_texto("Listo", Colores.VERDE)
+        assert capsys.readouterr().out == f"{Colores.VERDE}Listo{Colores.RESET}\n"
+
 
 class TestIntegracion:
     """Pruebas de integracion."""
@@ -319,6 +1279,339 @@ class TestIntegracion:
         finally:
             os.chdir(original_dir)
 
+    def test_interfaz_descarga_en_proceso(self, directorio_temporal):
+        """La interfaz descarga sin lanzar un proceso por URL."""
+        import main as interfaz
+
+        original_dir = os.getcwd()
+        os.chdir(directorio_temporal)
+
+        try:
+            ui = interfaz.ZoomDownloaderInterface()
+            with patch(
+                "simple_zoom_downloader.ejecutar_descarga", return_value=True
+            ) as descarga, patch("subprocess.run") as ejecutar:
+                ui.run_simple_downloader(
+                    "https://zoom.us/rec/play/abc123", "audio", "clase"
+                )
+                ui.run_simple_downloader(
+                    "https://zoom.us/rec/play/def456", "video", None
+                )
+
+            assert descarga.call_count == 2
+            assert descarga.call_args_list[0].args[:3] == (
+                "https://zoom.us/rec/play/abc123",
+                "audio",
+                "clase",
+            )
+            ejecutar.assert_not_called()
+        finally:
+            os.chdir(original_dir)
+
+    def test_interfaz_lote_en_proceso(self, directorio_temporal, capsys):
+        """La descarga masiva se ejecuta en el mismo proceso."""
+        import main as interfaz
+
+        original_dir = os.getcwd()
+        os.chdir(directorio_temporal)
+
+        try:
+            ui = interfaz.ZoomDownloaderInterface()
+            with patch(
+                "batch_downloader.main", side_effect=SystemExit(1)
+            ) as lote, patch("subprocess.run") as ejecutar:
+                ui.run_batch_downloader("input/urls.txt", "audio")
+
+            lote.assert_called_once_with(["input/urls.txt", "audio"])
+            ejecutar.assert_not_called()
+            assert "Error en la descarga masiva" in capsys.readouterr().out
+        finally:
+            os.chdir(original_dir)
+
+    def test_estado_cuenta_subtitulos(self, directorio_temporal, capsys):
+        """El estado cuenta las transcripciones .srt y .vtt."""
+        import main as interfaz
+
+        original_dir = os.getcwd()
+        os.chdir(directorio_temporal)
+
+        try:
+            ui = interfaz.ZoomDownloaderInterface()
+            os.makedirs("downloads/SRT", exist_ok=True)
+            for nombre in ("a.srt", "b.VTT", "c.txt"):
+                Path("downloads/SRT", nombre).write_text("x")
+
+            assert ui._count_files("downloads/SRT", {"srt", "vtt"}) == 2
+            assert ui._count_files("downloads/MP4", {"mp4"}) == 0
+
+            ui.show_download_status()
+            salida = capsys.readouterr().out
+            assert "Transcripciones: 2 archivos" in salida
+            assert "Tamano total: 3.0 B" in salida
+            assert salida.count(os.path.join("downloads", "SRT", "")) == 3
+        finally:
+            os.chdir(original_dir)
+
+    def test_listado_en_cache_por_mtime(self, directorio_temporal):
+        """Un directorio sin cambios no se vuelve a recorrer."""
+        import main as interfaz
+
+        original_dir = os.getcwd()
+        os.chdir(directorio_temporal)
+
+        try:
+            ui = interfaz.ZoomDownloaderInterface()
+            Path("input", "a.txt").write_text("x")
+
+            with patch("main.os.scandir", wraps=os.scandir) as recorrer:
+                assert ui._cached_listdir("input", {"txt"}) == ["a.txt"]
+                assert ui._cached_listdir("input", {"txt", "csv"}) == ["a.txt"]
+                assert recorrer.call_count == 1
+
+                Path("input", "b.csv").write_text("x")
+                os.utime("input", ns=(0, os.stat("input").st_mtime_ns + 1))
+                assert ui._cached_listdir("input", {"txt", "csv"}) == [
+                    "a.txt",
+                    "b.csv",
+                ]
+                assert recorrer.call_count == 2
+        finally:
+            os.chdir(original_dir)
+
+    def test_limpieza_borra_parciales(self, directorio_temporal, capsys):
+        """La limpieza borra los .part de todas las subcarpetas."""
+        import main as interfaz
+
+        original_dir = os.getcwd()
+        os.chdir(directorio_temporal)
+
+        try:
+            ui = interfaz.ZoomDownloaderInterface()
+            os.makedirs("downloads/MP4/sub", exist_ok=True)
+            for ruta in ("a.part", "MP4/b.mp4.part", "MP4/sub/c.part", "MP4/d.mp4"):
+                Path("downloads", ruta).write_text("x")
+
+            with patch("builtins.input", return_value="s"):
+                ui.clean_temp_files()
+
+            assert "Eliminados 3 archivos .part" in capsys.readouterr().out
+            assert [p.name for p in Path("downloads").rglob("*.*")] == ["d.mp4"]
+        finally:
+            os.chdir(original_dir)
+
+    def test_vista_previa_cuenta_lineas(self, directorio_temporal, capsys):
+        """La vista previa cuenta todas las lineas leyendo solo las primeras."""
+        import main as interfaz
+
+        ruta = Path(directorio_temporal) / "urls.txt"
+        ui = interfaz.ZoomDownloaderInterface.__new__(interfaz.ZoomDownloaderInterface)
+
+        for contenido, total in (("a\nb\n" * 4, 8), ("a\n" * 6 + "b", 7), ("", 0)):
+            ruta.write_text(contenido, encoding="utf-8")
+            ui.preview_file_content(str(ruta))
+            salida = capsys.readouterr().out
+            assert f"Total de lineas: {total}" in salida
+            if total > 5:
+                assert f"... y {total - 5} lineas mas" in salida
+
+    def test_eleccion_valida_cifras(self, capsys):
+        """Solo se aceptan numeros ASCII dentro del rango del menu."""
+        import main as interfaz
+
+        ui = interfaz.ZoomDownloaderInterface.__new__(interfaz.ZoomDownloaderInterface)
+        with patch("builtins.input", side_effect=["x", "\u00b2", "7", "", "3"]):
+            assert ui.get_user_choice(4) == 3
+
+        salida = capsys.readouterr().out
+        assert salida.count("Por favor, ingresa un numero valido") == 3
+        assert "entre 0 y 4" in salida
+
+    def test_limpiar_pantalla_sin_procesos(self, capsys):
+        """En una terminal ANSI se limpia la pantalla sin lanzar un shell."""
+        import main as interfaz
+
+        ui = interfaz.ZoomDownloaderInterface.__new__(interfaz.ZoomDownloaderInterface)
+        ui._ansi = True
+        with patch("main.os.system") as sistema:
+            ui.clear_screen()
+
+        sistema.assert_not_called()
+        assert capsys.readouterr().out == "\x1b[H\x1b[2J\x1b[3J"
+
+    def test_menu_tipo_descarga(self):
+        """Cada opcion del menu corresponde a su tipo; 0 vuelve atras."""
+        import main as interfaz
+
+        ui = interfaz.ZoomDownloaderInterface.__new__(interfaz.ZoomDownloaderInterface)
+        with patch("builtins.input", side_effect=["1", "4", "0"]):
+            assert ui._ask_download_type() == "video"
+            assert ui._ask_download_type() == "all"
+            assert ui._ask_download_type() is None
+
+    def test_interfaz_importa_sin_dependencias_pesadas(self):
+        """Importar la interfaz no carga subprocess ni los descargadores."""
+        import subprocess
+
+        codigo = (
+            "import sys, main; "
+            "print(any(m in sys.modules for m in "
+            "('subprocess', 'core', 'simple_zoom_downloader', 'batch_downloader')))"
+        )
+        salida = subprocess.run(
+            [sys.executable, "-c", codigo],
+            cwd=str(Path(__file__).parent.parent),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+
+        assert salida.strip() == "False"
+
+    def test_listado_entrada_con_tamanos(self, directorio_temporal, capsys):
+        """El listado de input/ muestra el tamano y devuelve las rutas."""
+        import main as interfaz
+
+        original_dir = os.getcwd()
+        os.chdir(directorio_temporal)
+
+        try:
+            ui = interfaz.ZoomDownloaderInterface()
+            Path("input", "b.CSV").write_text("xy")
+            Path("input", "a.txt").write_text("x")
+            Path("input", "notas.md").write_text("x")
+
+            archivos = ui.list_input_files()
+
+            assert archivos == [
+                os.path.join("input", "a.txt"),
+                os.path.join("input", "b.CSV"),
+            ]
+            salida = capsys.readouterr().out
+            assert "1. a.txt (1 bytes)" in salida
+            assert "2. b.CSV (2 bytes)" in salida
+        finally:
+            os.chdir(original_dir)
+
+    def test_listado_entrada_limitado(self, directorio_temporal, capsys):
+        """Con muchos archivos solo se listan los mas recientes."""
+        import main as interfaz
+
+        original_dir = os.getcwd()
+        os.chdir(directorio_temporal)
+
+        try:
+            ui = interfaz.ZoomDownloaderInterface()
+            for i in range(interfaz._MAX_INPUT_FILES + 5):
+                ruta = Path("input", f"urls_{i:03d}.txt")
+                ruta.write_text("x")
+                os.utime(ruta, (i, i))
+
+            archivos = ui.list_input_files()
+
+            assert len(archivos) == interfaz._MAX_INPUT_FILES
+            assert archivos[0] == os.path.join("input", "urls_054.txt")
+            assert os.path.join("input", "urls_004.txt") not in archivos
+            assert "mas recientes de 55" in capsys.readouterr().out
+        finally:
+            os.chdir(original_dir)
+
+    def test_descarga_individual_todo_en_una_pasada(self, directorio_temporal):
+        """En 'all' yt-dlp extrae el audio y no se vuelve a lanzar ffmpeg."""
+        import subprocess
+        import simple_zoom_downloader as sd
+
+        original_dir = os.getcwd()
+        os.chdir(directorio_temporal)
+        comandos = []
+
+        def descargar(cmd, progreso=None):
+            comandos.append(cmd)
+            Path("downloads/MP4/clase.mp4").write_bytes(b"mp4")
+            Path("downloads/MP4/clase.mp3").write_bytes(b"mp3")
+            Path("downloads/SRT/clase.es.vtt").write_text(
+                "WEBVTT\n\n00:00:00.000 --> 00:00:01.000\nHola\n"
+            )
+            Path("downloads/SRT/clase_10.es.vtt").write_text("WEBVTT\n")
+            return subprocess.CompletedProcess(cmd, 0, stdout=None, stderr="")
+
+        try:
+            config = cargar_configuracion("archivo_inexistente.yaml")
+            with patch.object(
+                sd, "instalar_dependencias", return_value=True
+            ), patch.object(sd, "ejecutar_yt_dlp", side_effect=descargar), patch(
+                "core.ejecutar_proceso"
+            ) as ffmpeg:
+                url = "https://zoom.us/rec/play/abc123"
+                assert sd.ejecutar_descarga(url, "all", "clase", config, MagicMock())
+
+            ffmpeg.assert_not_called()
+            assert "--extract-audio" in comandos[0]
+            assert "--keep-video" in comandos[0]
+            assert Path("downloads/MP3/clase.mp3").exists()
+            assert not Path("downloads/MP4/clase.mp3").exists()
+            assert Path("downloads/SRT/clase.es.srt").exists()
+            assert not Path("downloads/SRT/clase_10.es.srt").exists()
+        finally:
+            os.chdir(original_dir)
+
+    def test_descarga_individual_muestra_progreso(self, directorio_temporal, capsys):
+        """En una terminal el progreso de yt-dlp se muestra en la barra."""
+        import subprocess
+        import simple_zoom_downloader as sd
+
+        original_dir = os.getcwd()
+        os.chdir(directorio_temporal)
+
+        def descargar(cmd, progreso=None):
+            for porcentaje in (10.0, 55.5, 100.0):
+                progreso(porcentaje)
+            return subprocess.CompletedProcess(cmd, 0, stdout=None, stderr="")
+
+        try:
+            config = cargar_configuracion("archivo_inexistente.yaml")
+            with patch.object(
+                sd, "instalar_dependencias", return_value=True
+            ), patch.object(sd, "ejecutar_yt_dlp", side_effect=descargar), patch.object(
+                sys.stdout, "isatty", return_value=True
+            ):
+                url = "https://zoom.us/rec/play/abc123"
+                assert sd.ejecutar_descarga(url, "video", "clase", config, MagicMock())
+
+            assert "(100/100)" in capsys.readouterr().out
+        finally:
+            os.chdir(original_dir)
+
+    def test_descarga_individual_comprueba_dependencias_una_vez(
+        self, directorio_temporal
+    ):
+        """Las descargas siguientes del proceso no repiten la comprobacion."""
+        import subprocess
+        import simple_zoom_downloader as sd
+
+        original_dir = os.getcwd()
+        os.chdir(directorio_temporal)
+
+        def descargar(cmd, progreso=None):
+            return subprocess.CompletedProcess(cmd, 0, stdout=None, stderr="")
+
+        try:
+            config = cargar_configuracion("archivo_inexistente.yaml")
+            with patch.object(sd, "_DEPENDENCIAS_LISTAS", False), patch.object(
+                sd, "instalar_dependencias", return_value=True
+            ) as instalar, patch.object(sd, "ejecutar_yt_dlp", side_effect=descargar):
+                for _ in range(3):
+                    assert sd.ejecutar_descarga(
+                        "https://zoom.us/rec/play/abc123",
+                        "transcript",
+                        "clase",
+                        config,
+                        MagicMock(),
+                    )
+
+            instalar.assert_called_once()
+        finally:
+            os.chdir(original_dir)
+
 
 def pytest_configure(config):
     """Configuracion de pytest."""